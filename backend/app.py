@@ -1,9 +1,24 @@
+import asyncio
 import os
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 from fastapi.staticfiles import StaticFiles
+import startup
 from routers import professional_router
 from routers import human_router
+from audio_cache import audio_cache
+from semantic_cache import answer_cache
+from extraction_cache import extraction_cache
+from context_builder import context_stats
+from multilingual import translation_memory
+from audio_jobs import audio_jobs
+from llm_gateway import LLMUnavailableError, chat_gateway, translation_gateway
+from single_flight import single_flight
+from metrics import registry
+from tracing import start_trace
 
 load_dotenv()
 
@@ -11,10 +26,26 @@ load_dotenv()
 if not os.getenv("GOOGLE_API_KEY"):
     raise EnvironmentError("GOOGLE_API_KEY environment variable not set.")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up without blocking startup, so liveness checks pass immediately
+    # and readiness flips once the model, store and client are loaded.
+    warm_up = None
+    if startup.WARMUP_MODE == "background":
+        warm_up = asyncio.create_task(startup.warm_up_in_background())
+    yield
+    if warm_up is not None:
+        warm_up.cancel()
+    if answer_cache.save_due(force=True):
+        await asyncio.to_thread(answer_cache.save, answer_cache.snapshot())
+
+
 app = FastAPI(
     title="Pravaah Legal AI",
     description="API for summarizing and advising on legal documents.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # --- Directory Setup ---
@@ -25,11 +56,84 @@ os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
 
 app.mount("/static", StaticFiles(directory=STATIC_DIRECTORY), name="static")
 
+request_seconds = registry.histogram(
+    "pravaah_request_duration_seconds", "HTTP request latency.", ["route", "status"]
+)
+
+
+def _embedding_stats() -> dict:
+    return startup.query_embedder().stats() if startup.is_loaded("query_embedder") else {}
+
+
+registry.register_stats("audio_cache", audio_cache.stats)
+registry.register_stats("answer_cache", answer_cache.stats)
+registry.register_stats("extraction_cache", extraction_cache.stats)
+registry.register_stats("translation_memory", translation_memory.stats)
+registry.register_stats("context", context_stats.stats)
+registry.register_stats("embedding", _embedding_stats)
+registry.register_stats("audio_jobs", audio_jobs.stats)
+registry.register_stats("chat_gateway", chat_gateway.stats)
+registry.register_stats("translation_gateway", translation_gateway.stats)
+registry.register_stats("single_flight", single_flight.stats)
+
+
+@app.exception_handler(LLMUnavailableError)
+async def handle_llm_unavailable(request: Request, error: LLMUnavailableError):
+    return JSONResponse({"detail": str(error)}, status_code=503, headers={"Retry-After": "5"})
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    with start_trace(f"{request.method} {request.url.path}") as trace:
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Trace-Id"] = trace.id
+            return response
+        finally:
+            # The route template, not the raw path, keeps label cardinality bounded.
+            route = request.scope.get("route")
+            request_seconds.observe(
+                time.perf_counter() - start,
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Pravaah Legal AI API"}
 
 
+@app.get("/healthz")
+def read_liveness():
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+def read_readiness():
+    body = {
+        "status": "ready" if startup.is_ready() else startup.state["status"],
+        "error": startup.state["error"],
+        "load_seconds": startup.state["load_seconds"],
+    }
+    return JSONResponse(body, status_code=200 if startup.is_ready() else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    return registry.render()
+
+
+@app.get("/audio-jobs/{job_id}")
+def read_audio_job(job_id: str):
+    status = audio_jobs.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown audio job.")
+    return status
+
+
 app.include_router(router=human_router.router)
 app.include_router(router=professional_router.router)
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TTS_CACHE_DIRECTORY = os.path.join(BASE_DIR, "static", "tts")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_MB", "500")) * 1024 * 1024
+TTS_CACHE_MAX_AGE = float(os.getenv("TTS_CACHE_MAX_AGE_HOURS", "168")) * 3600
+
+
+class AudioCache:
+    """
+    Content-addressed store for synthesized speech.
+
+    Each clip is saved as `<sha256 of text, voice and rate>.mp3` under
+    `static/tts`, so identical answers map to the same file and concurrent
+    requests never write to each other's output. A clip's modification time is
+    refreshed on every hit and used as its last-access time for eviction.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(text: str, voice_model: str, rate: str) -> str:
+        digest = hashlib.sha256()
+        for part in (text, voice_model, rate):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    @staticmethod
+    def url_for(key: str) -> str:
+        return f"static/tts/{key}.mp3"
+
+    def get(self, key: str) -> str | None:
+        """Returns the clip's path if it is cached and still fresh."""
+        path = self.path_for(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        if now - stat.st_mtime > self.max_age:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        os.utime(path, (now, now))
+        self.hits += 1
+        return path
+
+    def temp_path_for(self, key: str) -> str:
+        """A private path to synthesize into before `commit` publishes it."""
+        return os.path.join(self.directory, f".{key}.{os.getpid()}.{time.time_ns()}.part")
+
+    def commit(self, key: str, temp_path: str) -> str:
+        path = self.path_for(key)
+        os.replace(temp_path, path)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Drops clips idle for longer than max_age, then the least recently used ones over max_bytes."""
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".mp3"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                self._remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            self.evictions += 1
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+audio_cache = AudioCache(
+    directory=TTS_CACHE_DIRECTORY,
+    max_bytes=TTS_CACHE_MAX_BYTES,
+    max_age=TTS_CACHE_MAX_AGE,
+)
@@ -0,0 +1,99 @@
+"""
+Speech synthesis as background jobs.
+
+In "background" mode the query endpoints return the answer text as soon as
+it is generated, together with the URL its audio will have and a job id to
+poll. A job's id is the answer's audio cache key, so the URL is known before
+synthesis starts, identical answers share one job, and a finished clip can
+be found by any worker even if a different worker ran the job.
+"""
+import asyncio
+import contextvars
+import os
+import re
+import time
+
+from audio_cache import audio_cache
+from multilingual import TTS_RATE, synthesize_answer
+
+# "background" queues synthesis after the response; "inline" waits for it.
+AUDIO_MODE = os.getenv("AUDIO_MODE", "background")
+AUDIO_JOB_CONCURRENCY = int(os.getenv("AUDIO_JOB_CONCURRENCY", "4"))
+AUDIO_JOB_RETENTION = float(os.getenv("AUDIO_JOB_RETENTION_SECONDS", "3600"))
+
+JOB_ID = re.compile(r"[0-9a-f]{64}")
+
+
+class AudioJobs:
+    """Synthesis jobs of this worker, at most `concurrency` running at once."""
+
+    def __init__(self, concurrency: int, retention: float):
+        self.concurrency = concurrency
+        self.retention = retention
+        self.jobs = {}
+        self._tasks = set()
+        self._slots = None
+
+    def submit(self, text: str, voice_model: str) -> str:
+        """Queues synthesis of `text` unless its clip exists or is already queued. Returns the job id."""
+        text = text.strip()
+        job_id = audio_cache.key(text, voice_model, TTS_RATE)
+        job = self.jobs.get(job_id)
+        if job and job["status"] in ("queued", "running"):
+            return job_id
+
+        if audio_cache.get(job_id):
+            self.jobs[job_id] = self._job("done")
+            return job_id
+
+        self.jobs[job_id] = self._job("queued")
+        # A fresh context keeps the job's spans out of the submitting request's trace.
+        task = asyncio.create_task(
+            self._run(job_id, text, voice_model), context=contextvars.Context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self._prune()
+        return job_id
+
+    @staticmethod
+    def _job(status: str, error: str | None = None) -> dict:
+        return {"status": status, "error": error, "updated": time.time()}
+
+    async def _run(self, job_id: str, text: str, voice_model: str):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        async with self._slots:
+            self.jobs[job_id] = self._job("running")
+            try:
+                await synthesize_answer(text, voice_model)
+                self.jobs[job_id] = self._job("done")
+            except Exception as e:
+                print(f"Audio job {job_id} failed: {e}")
+                self.jobs[job_id] = self._job("failed", str(e))
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self.jobs.items()):
+            if job["status"] in ("done", "failed") and job["updated"] < cutoff:
+                del self.jobs[job_id]
+
+    def status(self, job_id: str) -> dict | None:
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        job = self.jobs.get(job_id)
+        if job is None:
+            # Submitted to another worker, or pruned: the clip itself is the record.
+            if not os.path.exists(audio_cache.path_for(job_id)):
+                return None
+            job = self._job("done")
+        return {"job_id": job_id, "audio_path": audio_cache.url_for(job_id), **job}
+
+    def stats(self) -> dict:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self.jobs.values():
+            counts[job["status"]] += 1
+        return counts
+
+
+audio_jobs = AudioJobs(concurrency=AUDIO_JOB_CONCURRENCY, retention=AUDIO_JOB_RETENTION)
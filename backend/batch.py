@@ -0,0 +1,174 @@
+"""
+Answering many queries, or many uploaded files, in one request.
+
+A query batch is embedded in a single forward pass and searched with one
+Chroma query per act scope, then each item is answered through the normal
+pipeline. File batches are extracted and answered item by item. Either way
+at most BATCH_CONCURRENCY batch items are in flight at once across all
+batches in the process, so batch requests, however many run in parallel,
+cannot take every LLM slot from interactive users.
+
+Results are yielded as each item finishes, not in request order; every
+result carries its `index`. A failing item is reported on its own, with the
+status code the single-item endpoint would have returned, and does not fail
+the rest of the batch.
+"""
+import asyncio
+import os
+
+from fastapi import HTTPException, UploadFile
+
+from llm import dense_search_many, embed_queries, run_pipeline, search_acts, skips_embedding
+from llm_gateway import LLMUnavailableError
+from long_document import is_long_document, run_long_document
+from ocr_processor import OcrBusyError
+from uploads import SIGNATURES, UPLOAD_MAX_BYTES, extract_text, read_upload
+
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "50"))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "10"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# All files of one batch upload together, on top of UPLOAD_MAX_MB per file.
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_MB", "100")) * 1024 * 1024
+
+_batch_slots = None
+
+
+def _failure(e: Exception) -> dict:
+    if isinstance(e, HTTPException):
+        return {"status_code": e.status_code, "error": e.detail}
+    if isinstance(e, (OcrBusyError, LLMUnavailableError)):
+        return {"status_code": 503, "error": str(e)}
+    return {"status_code": 500, "error": f"An unexpected error occurred: {e}"}
+
+
+async def fan_out(jobs: dict):
+    """
+    Runs `{index: factory}` jobs, BATCH_CONCURRENCY at a time, yielding one
+    result dict per job as it finishes and a summary line at the end. Each
+    factory returns a coroutine resolving to `(text, audio_path, audio_job)`.
+    """
+    global _batch_slots
+    if _batch_slots is None:
+        _batch_slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(index, factory):
+        async with _batch_slots:
+            try:
+                text, audio_path, audio_job = await factory()
+            except Exception as e:
+                print(f"Batch item {index} failed: {e}")
+                return {"index": index, "status": "error", **_failure(e)}
+        return {
+            "index": index,
+            "status": "ok",
+            "text": text,
+            "audio_path": audio_path,
+            "audio_job": audio_job,
+        }
+
+    tasks = [asyncio.ensure_future(run(index, factory)) for index, factory in jobs.items()]
+    failed = 0
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            failed += result["status"] == "error"
+            yield result
+    finally:
+        # The client went away: stop answering for nobody.
+        for task in tasks:
+            task.cancel()
+    yield {"status": "done", "succeeded": len(tasks) - failed, "failed": failed}
+
+
+async def run_query_batch(
+    pipeline: str, queries: list[str], lang: str, audio: bool = True, acts: list[str] | None = None
+):
+    """
+    Yields a result per query as it is answered. Queries scoped to the same
+    acts share one Chroma query. Queries that cite a statute skip the shared
+    embedding and search, as they do one at a time.
+    """
+    embedded = [
+        index for index, query in enumerate(queries)
+        if query.strip() and not skips_embedding(pipeline, query)
+    ]
+    embeddings = dict(zip(embedded, await embed_queries([queries[index] for index in embedded])))
+
+    groups = {}
+    for index in embedded:
+        scope = search_acts(queries[index], acts)
+        groups.setdefault(tuple(scope or ()), []).append(index)
+    prepared = {}
+    for scope, indexes in groups.items():
+        results = await dense_search_many(
+            pipeline, [embeddings[index] for index in indexes], list(scope) or None
+        )
+        for index, documents in zip(indexes, results):
+            prepared[index] = (embeddings[index], documents)
+
+    def job(index: int, query: str):
+        async def answer():
+            if not query.strip():
+                raise HTTPException(status_code=400, detail="Query is required.")
+            embedding, dense_documents = prepared.get(index, (None, None))
+            return await run_pipeline(pipeline, query, lang, audio, acts, embedding, dense_documents)
+
+        return answer
+
+    async for result in fan_out({index: job(index, query) for index, query in enumerate(queries)}):
+        yield result
+
+
+async def read_uploads(files: list[UploadFile]) -> list:
+    """
+    Reads every file of a batch upload before the response starts streaming,
+    since the uploads are closed once the endpoint returns. Each entry is
+    either `(data, sha256, extension)` or the HTTPException that rejected it.
+    Files are read in chunks against what is left of BATCH_MAX_BYTES, so a
+    batch never holds more than that in memory; a file that would go past it
+    is rejected with 413 as soon as it does.
+    """
+    uploads = []
+    remaining = BATCH_MAX_BYTES
+    for file in files:
+        file_ext = os.path.splitext(file.filename)[1].lower()
+        if file_ext not in SIGNATURES:
+            uploads.append(HTTPException(
+                status_code=400, detail=f"Invalid file type. Allowed: {set(SIGNATURES)}"
+            ))
+            continue
+        limit = min(UPLOAD_MAX_BYTES, remaining)
+        try:
+            upload = await read_upload(file, max_bytes=limit)
+        except HTTPException as e:
+            if e.status_code == 413 and limit < UPLOAD_MAX_BYTES:
+                e = HTTPException(status_code=413, detail=_batch_too_large())
+            uploads.append(e)
+            continue
+        remaining -= len(upload[0])
+        uploads.append(upload)
+    return uploads
+
+
+def _batch_too_large() -> str:
+    return f"Batch uploads are limited to {BATCH_MAX_BYTES // (1024 * 1024)} MB in total."
+
+
+async def run_document_batch(pipeline: str, uploads: list, lang: str, audio: bool, upload_directory: str):
+    """Yields a result per uploaded file, in the format of `run_query_batch`."""
+
+    def job(upload):
+        async def answer():
+            if isinstance(upload, Exception):
+                raise upload
+            success, content = await extract_text(*upload, upload_directory)
+            if not success:
+                raise HTTPException(status_code=500, detail=content)
+            if is_long_document(content):
+                return await run_long_document(pipeline, content, lang, audio)
+            return await run_pipeline(pipeline, content, lang, audio)
+
+        return answer
+
+    async for result in fan_out({index: job(upload) for index, upload in enumerate(uploads)}):
+        yield result
@@ -0,0 +1,122 @@
+"""
+Act-scoped against unscoped dense retrieval: search latency, and precision@k
+measured as the share of retrieved chunks that come from the act a question
+is about.
+
+Each question below is about one act but does not name it, so the unscoped
+search has nothing to go on but the embedding; the scoped search passes the
+act as a Chroma `where` filter, as `llm.dense_search` does when a
+request names or implies an act. By default the configured store under
+CHROMA_PATH is searched. With --fake, fixture acts are ingested with fake
+embeddings into a temporary store: latencies are still Chroma's own, but
+precision is meaningless.
+
+Usage (from the backend directory):
+    python -m benchmarks.act_filter_benchmark --repeat 5
+    python -m benchmarks.act_filter_benchmark --fake --files 3
+"""
+import argparse
+import statistics
+import sys
+import time
+from contextlib import nullcontext
+
+from benchmarks.fakes import fake_store, temporary_chroma_path
+
+if "--fake" in sys.argv:
+    temporary_chroma_path()
+
+from benchmarks.report import emit, latency_summary
+from vector import act_filter, get_embedding_function, get_vector_store
+
+K_VALUES = (3, 5, 7)
+
+QUESTIONS = {
+    "Air Prevention 1981.pdf": "Who may be appointed to a State Pollution Control Board?",
+    "BNS.pdf": "What is the punishment for organised crime?",
+    "Citizenship Act 1955.pdf": "How is citizenship acquired by registration?",
+    "Civil Procedure 1908.pdf": "When may a court reject a plaint?",
+    "Companies Act 2013.pdf": "What are the duties of directors of a company?",
+    "Conciliation Act 1996.pdf": "On what grounds may an arbitral award be set aside?",
+    "Consumer Act 2019.pdf": "What is the procedure for filing a complaint against a trader for a defective product?",
+    "Criminal Procedure 1973.pdf": "When can the police arrest without a warrant?",
+    "Evidence Act 1872.pdf": "When is a confession made to a police officer admissible?",
+    "Factories Act 1948.pdf": "Who is liable as the occupier of a factory?",
+    "Indian Contract 1872.pdf": "When is an agreement void for lack of consideration?",
+    "Legal Authhorities 1987.pdf": "Who is entitled to free legal services?",
+    "Limitation Act 1963.pdf": "What is the period for a suit for recovery of money lent?",
+    "Patent Act 1970.pdf": "What inventions are not patentable?",
+    "PenalCode.pdf": "What is the punishment for theft?",
+    "Prevention of Corruption 1988.pdf": "What is the punishment for a public servant taking a bribe?",
+    "Registration Act 1860.pdf": "Which documents must be compulsorily registered?",
+    "Social Security 2020.pdf": "Who is entitled to maternity benefit?",
+    "Specific Relief 1963.pdf": "When can a perpetual injunction be granted?",
+    "Trade Marks Act 1999.pdf": "On what grounds may registration of a trade mark be refused?",
+    "Transfer of Property 1882.pdf": "What is a usufructuary mortgage?",
+    "Wildlife Act 1972.pdf": "What is the penalty for hunting a wild animal?",
+}
+
+
+def run(search, vectors: list, acts: list[str], repeat: int) -> dict:
+    latencies, precisions = [], []
+    for _ in range(repeat):
+        for vector, act in zip(vectors, acts):
+            start = time.perf_counter()
+            documents = search(vector, act)
+            latencies.append(time.perf_counter() - start)
+            if documents:
+                precisions.append(
+                    sum(doc.metadata.get("act") == act for doc in documents) / len(documents)
+                )
+    return {
+        **latency_summary(latencies),
+        "precision": round(statistics.mean(precisions), 3) if precisions else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fake", action="store_true")
+    parser.add_argument("--files", type=int, default=3, help="Acts to ingest with --fake.")
+    parser.add_argument("--output", help="Also write the JSON result to this file.")
+    args = parser.parse_args()
+
+    if args.fake:
+        store = fake_store(args.files)
+    else:
+        embeddings = get_embedding_function()
+        store = nullcontext((get_vector_store(embedding_function=embeddings), embeddings))
+
+    with store as (vector_store, embeddings):
+        # Only acts in the store can be scoped to.
+        stored = {
+            metadata.get("act")
+            for metadata in vector_store.get(include=["metadatas"])["metadatas"]
+            if metadata
+        }
+        acts = [act for act in QUESTIONS if act in stored]
+        if not acts:
+            sys.exit("No chunk in the store is tagged with an act; re-run ingest.py first.")
+        vectors = [embeddings.embed_query(QUESTIONS[act]) for act in acts]
+        # The first search loads the HNSW index; keep it out of the timings.
+        vector_store.similarity_search_by_vector(vectors[0], k=1)
+
+        results = {"questions": len(acts), "acts_in_store": len(stored), "repeat": args.repeat}
+        for k in K_VALUES:
+            results[f"unscoped_k{k}"] = run(
+                lambda vector, act: vector_store.similarity_search_by_vector(vector, k=k),
+                vectors, acts, args.repeat,
+            )
+            results[f"scoped_k{k}"] = run(
+                lambda vector, act: vector_store.similarity_search_by_vector(
+                    vector, k=k, filter=act_filter([act])
+                ),
+                vectors, acts, args.repeat,
+            )
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
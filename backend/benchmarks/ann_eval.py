@@ -0,0 +1,169 @@
+"""
+Recall and latency of Chroma's HNSW index across index settings, measured
+against exact brute-force neighbours.
+
+The stored vectors are read once from the collection and re-indexed into
+in-memory collections, one per (M, construction ef) pair; each is then
+searched at several search ef values and k. Exact neighbours are computed
+with numpy in the same distance space, so recall@k is the share of the true
+k nearest chunks the index returns. Compare the rows to choose HNSW_M,
+HNSW_CONSTRUCTION_EF, HNSW_SEARCH_EF and the per-pipeline k/fetch_k settings.
+
+Queries are stored vectors with a little Gaussian noise added, so no model
+is needed; --questions embeds the retrieval-quality questions with the
+configured model instead. By default the configured store under CHROMA_PATH
+is read. With --fake, fixture acts are ingested with fake embeddings into a
+temporary store first.
+
+Usage (from the backend directory):
+    python -m benchmarks.ann_eval --m 16 32 --search-ef 10 20 50 100
+    python -m benchmarks.ann_eval --fake --files 3
+"""
+import argparse
+import random
+import sys
+import time
+from contextlib import nullcontext
+
+from benchmarks.fakes import fake_store, temporary_chroma_path
+
+if "--fake" in sys.argv:
+    temporary_chroma_path()
+
+import numpy as np
+
+from benchmarks.report import emit, latency_summary
+from vector import (
+    CHROMA_PATH,
+    HNSW_SPACE,
+    get_embedding_function,
+    get_vector_store,
+    hnsw_metadata,
+    set_search_ef,
+)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    """Row indices of each query's k nearest vectors, nearest first."""
+    if space == "l2":
+        distances = (
+            (queries ** 2).sum(axis=1)[:, None]
+            - 2 * queries @ vectors.T
+            + (vectors ** 2).sum(axis=1)[None, :]
+        )
+    elif space == "cosine":
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        distances = -(queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T
+    elif space == "ip":
+        distances = -(queries @ vectors.T)
+    else:
+        raise ValueError(f"Unknown space {space!r}.")
+    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+    return np.take_along_axis(nearest, order, axis=1)
+
+
+def build_index(client, ids: list[str], vectors: np.ndarray, space: str, m: int, construction_ef: int):
+    collection = client.create_collection(
+        f"ann-eval-{space}-m{m}-ef{construction_ef}",
+        metadata=hnsw_metadata(space=space, m=m, construction_ef=construction_ef),
+    )
+    batch_size = client.get_max_batch_size()
+    for start in range(0, len(ids), batch_size):
+        collection.add(
+            ids=ids[start : start + batch_size],
+            embeddings=vectors[start : start + batch_size].tolist(),
+        )
+    return collection
+
+
+def evaluate(collection, queries: np.ndarray, truth: dict, ids: list[str], k: int) -> dict:
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth[k]):
+        start = time.perf_counter()
+        found = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])["ids"][0]
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(set(found) & {ids[i] for i in expected}) / k)
+    return {"recall": round(float(np.mean(recalls)), 4), **latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--space", default=HNSW_SPACE, choices=["l2", "cosine", "ip"])
+    parser.add_argument("--m", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 20, 50, 100])
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 7, 20], help="The pipelines' k and fetch_k.")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--noise", type=float, default=0.05, help="Relative noise added to sampled queries.")
+    parser.add_argument("--questions", action="store_true", help="Embed real questions as the queries.")
+    parser.add_argument("--fake", action="store_true")
+    parser.add_argument("--files", type=int, default=3, help="Acts to ingest with --fake.")
+    parser.add_argument("--output", help="Also write the JSON result to this file.")
+    args = parser.parse_args()
+
+    import chromadb
+
+    if args.fake:
+        store = fake_store(args.files)
+    else:
+        store = nullcontext((get_vector_store(embedding_function=get_embedding_function()), None))
+
+    with store as (vector_store, _embeddings):
+        stored = vector_store.get(include=["embeddings"])
+        ids = stored["ids"]
+        vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+        if not ids:
+            sys.exit(f"The collection under {CHROMA_PATH} is empty; run ingest.py first.")
+        current = (vector_store._collection.configuration or {}).get("hnsw") or {}
+
+    if args.questions:
+        from benchmarks.retrieval_quality import QUESTIONS
+
+        embeddings = get_embedding_function()
+        queries = np.asarray([embeddings.embed_query(question) for question in QUESTIONS], dtype=np.float32)
+    else:
+        rng = random.Random(0)
+        sample = vectors[rng.sample(range(len(ids)), min(args.queries, len(ids)))]
+        noise = np.random.default_rng(0).normal(size=sample.shape).astype(np.float32)
+        scale = args.noise * np.linalg.norm(sample, axis=1, keepdims=True) / np.sqrt(sample.shape[1])
+        queries = sample + noise * scale
+
+    ks = sorted(k for k in args.k if k <= len(ids))
+    brute_force_latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        exact_neighbours(vectors, query[None, :], max(ks), args.space)
+        brute_force_latencies.append(time.perf_counter() - start)
+    truth = {k: exact_neighbours(vectors, queries, k, args.space) for k in ks}
+
+    results = {
+        "vectors": len(ids),
+        "dimensions": int(vectors.shape[1]),
+        "space": args.space,
+        "queries": len(queries),
+        "current_index": current,
+        "brute_force": latency_summary(brute_force_latencies),
+        "settings": {},
+    }
+    client = chromadb.EphemeralClient()
+    for m in args.m:
+        for construction_ef in args.construction_ef:
+            start = time.perf_counter()
+            collection = build_index(client, ids, vectors, args.space, m, construction_ef)
+            build_seconds = round(time.perf_counter() - start, 2)
+            for search_ef in args.search_ef:
+                set_search_ef(collection, search_ef)
+                # The first search loads the index; keep it out of the timings.
+                collection.query(query_embeddings=[queries[0].tolist()], n_results=1, include=[])
+                results["settings"][f"m{m}_construction_ef{construction_ef}_search_ef{search_ef}"] = {
+                    "build_seconds": build_seconds,
+                    **{f"k{k}": evaluate(collection, queries, truth, ids, k) for k in ks},
+                }
+            client.delete_collection(collection.name)
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
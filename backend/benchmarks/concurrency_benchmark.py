@@ -0,0 +1,179 @@
+"""
+Measures latency and throughput of the router endpoints under N parallel requests.
+
+Gemini, translation and edge-tts are replaced by local fakes, so the numbers
+reflect how well the server overlaps concurrent requests rather than model
+speed. With a blocking pipeline p99 grows linearly with concurrency; with the
+async path it should stay close to a single request's latency.
+
+All eight endpoints are exercised by default: the four query endpoints and
+the four upload endpoints. Uploads send a digital-text PDF made from the first
+pages of an act, made unique per request so the extraction cache is bypassed.
+
+Needs the bench extra (uv sync --extra bench) for httpx.
+
+Usage (from the backend directory):
+    python -m benchmarks.concurrency_benchmark --requests 50 --concurrency 10
+    python -m benchmarks.concurrency_benchmark --endpoints /human/query-summarizer/
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import fitz  # PyMuPDF
+import httpx
+
+import llm
+import multilingual
+import startup
+from app import app
+from benchmarks.fakes import (
+    FakeChatModel,
+    FakeEmbeddings,
+    FakeVectorStore,
+    fake_synthesize,
+    fake_translate,
+)
+from benchmarks.report import emit, latency_summary
+from llm_gateway import chat_gateway
+
+QUERY_ENDPOINTS = [
+    "/human/query-summarizer/",
+    "/human/query-advisor/",
+    "/professional/query-professional-summarizer/",
+    "/professional/query-professional-advisor/",
+]
+UPLOAD_ENDPOINTS = [
+    "/human/upload-file-human-summarizer/",
+    "/human/upload-file-human-advisor/",
+    "/professional/upload-file-professional-summarizer/",
+    "/professional/upload-file-professional-advisor/",
+]
+STREAM_ENDPOINTS = [
+    "/human/query-summarizer/stream/",
+    "/human/query-advisor/stream/",
+    "/professional/query-professional-summarizer/stream/",
+    "/professional/query-professional-advisor/stream/",
+]
+
+
+def fixture_pdf(source: str, pages: int) -> bytes:
+    with fitz.open(source) as original, fitz.open() as fixture:
+        fixture.insert_pdf(original, from_page=0, to_page=pages - 1)
+        return fixture.tobytes()
+
+
+async def run(endpoint: str, requests: int, concurrency: int, language: str, upload: bytes):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None
+    ) as client:
+
+        async def one_request(i):
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                if endpoint in UPLOAD_ENDPOINTS:
+                    # Bytes after %%EOF are ignored by readers but change the hash.
+                    data = upload + f"\n% request {i}\n".encode()
+                    response = await client.post(
+                        endpoint,
+                        params={"language": language},
+                        files={"file": ("fixture.pdf", data, "application/pdf")},
+                    )
+                else:
+                    response = await client.post(
+                        endpoint,
+                        json={"query": f"What is the punishment for theft? ({i})", "language": language},
+                    )
+                if response.status_code != 200:
+                    failures += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_request(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "failures": failures,
+        "wall_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        **(latency_summary(latencies) if latencies else {}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--endpoints", nargs="+", default=QUERY_ENDPOINTS + UPLOAD_ENDPOINTS)
+    parser.add_argument("--streams", action="store_true", help="Also run the four streaming endpoints.")
+    parser.add_argument("--language", default="eng")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds to the first token.")
+    parser.add_argument("--token-rate", type=float, default=None, help="Fake Gemini tokens per second.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake Gemini calls that return 429.")
+    parser.add_argument("--translate-latency", type=float, default=0.5)
+    parser.add_argument("--audio-mode", choices=["background", "inline"], default=llm.AUDIO_MODE)
+    parser.add_argument("--upload-source", default=os.path.join("PDFS", "Limitation Act 1963.pdf"))
+    parser.add_argument("--upload-pages", type=int, default=1)
+    parser.add_argument(
+        "--fake-retrieval",
+        action="store_true",
+        help="Replace the embedding model and Chroma store with fakes.",
+    )
+    parser.add_argument(
+        "--answer-cache",
+        action="store_true",
+        help="Leave the semantic answer cache on (off by default so every request runs the pipeline).",
+    )
+    parser.add_argument("--output", help="Also write the JSON result to this file.")
+    args = parser.parse_args()
+
+    startup.override(
+        "chat_model",
+        FakeChatModel(latency=args.llm_latency, token_rate=args.token_rate, error_rate=args.error_rate),
+    )
+    multilingual.synthesize = fake_synthesize
+    multilingual.translate = lambda text, lang: fake_translate(text, lang, args.translate_latency)
+    llm.ANSWER_CACHE_ENABLED = args.answer_cache
+    llm.AUDIO_MODE = args.audio_mode
+    if args.fake_retrieval:
+        startup.override("embedding_function", FakeEmbeddings())
+        startup.override("vector_store", FakeVectorStore())
+
+    upload = fixture_pdf(args.upload_source, args.upload_pages)
+    endpoints = args.endpoints + (STREAM_ENDPOINTS if args.streams else [])
+
+    results = {
+        "concurrency": args.concurrency,
+        "language": args.language,
+        "llm_latency": args.llm_latency,
+        "token_rate": args.token_rate,
+        "audio_mode": args.audio_mode,
+        "fake_retrieval": args.fake_retrieval,
+        "endpoints": {},
+    }
+
+    # One event loop for every endpoint: the embedder, OCR slots and audio
+    # jobs bind their queues and semaphores to the loop they first run on.
+    async def run_all():
+        for endpoint in endpoints:
+            results["endpoints"][endpoint] = await run(
+                endpoint, args.requests, args.concurrency, args.language, upload
+            )
+
+    asyncio.run(run_all())
+    results["llm_gateway"] = chat_gateway.stats()
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compares query-embedding throughput of the per-request path with the
+micro-batching embedder under concurrent load.
+
+The per-request path runs one `embed_query` forward pass per request on the
+retrieval pool, as retrieval did before batching. The batched path sends the
+same requests through `BatchingEmbedder`.
+
+Usage (from the backend directory):
+    python -m benchmarks.embedding_benchmark --requests 256 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.fakes import FakeEmbeddings
+from embedding_service import BatchingEmbedder
+from executors import run_blocking
+
+QUESTIONS = [
+    "What is the punishment for theft?",
+    "When can a perpetual injunction be granted?",
+    "What is the limitation period for a suit on a contract?",
+    "Who can register a trade mark?",
+    "What are the duties of an occupier of a factory?",
+    "How is a company incorporated?",
+    "What is criminal breach of trust?",
+    "When is a contract voidable?",
+]
+
+
+async def drive(embed, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await embed(f"{QUESTIONS[i % len(QUESTIONS)]} ({i})")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start
+
+
+async def run(embeddings, args):
+    async def per_request(text):
+        return await run_blocking(embeddings.embed_query, text)
+
+    baseline = await drive(per_request, args.requests, args.concurrency)
+
+    embedder = BatchingEmbedder(
+        embeddings, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms
+    )
+    batched = await drive(embedder.embed_query, args.requests, args.concurrency)
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "per_request_qps": round(args.requests / baseline, 2),
+        "batched_qps": round(args.requests / batched, 2),
+        "speedup": round(baseline / batched, 2),
+        "batching": embedder.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument(
+        "--fake", action="store_true", help="Use a fake model instead of instructor-large."
+    )
+    args = parser.parse_args()
+
+    if args.fake:
+        embeddings = FakeEmbeddings()
+    else:
+        from vector import get_embedding_function
+
+        embeddings = get_embedding_function()
+
+    print(json.dumps(asyncio.run(run(embeddings, args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
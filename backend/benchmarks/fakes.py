@@ -0,0 +1,213 @@
+"""
+Local stand-ins for the external services used by the pipelines.
+
+The benchmarks swap these in for Gemini, the Chroma store and edge-tts so that
+latency can be measured offline and without spending API quota.
+"""
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from langchain.schema.document import Document
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+FAKE_ANSWER = (
+    "Theft is punishable with imprisonment of either description for a term "
+    "which may extend to three years, or with fine, or with both. "
+    "Please remember, this is a simplified explanation for informational "
+    "purposes and not legal advice."
+)
+
+
+class ResourceExhausted(Exception):
+    """Named like the google.api_core error Gemini raises for a 429."""
+
+
+class FakeChatModel:
+    """
+    Mimics `ChatGoogleGenerativeAI` with a fixed reply. `latency` is the time
+    to the first token; with a `token_rate` (tokens per second) the reply then
+    takes as long to generate as Gemini would at that rate, and streams at it.
+    A fraction `error_rate` of calls fails with a 429, and a fraction
+    `slow_rate` takes `slow_latency` longer, to exercise the gateway's
+    retries and hedging.
+    """
+
+    def __init__(
+        self,
+        latency: float = 1.0,
+        reply: str = FAKE_ANSWER,
+        token_rate: float | None = None,
+        error_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 0.0,
+    ):
+        self.latency = latency
+        self.reply = reply
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+
+    def _maybe_fail(self):
+        if self.error_rate and random.random() < self.error_rate:
+            raise ResourceExhausted("429 Resource has been exhausted (fake).")
+
+    def _words(self) -> list[str]:
+        words = self.reply.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def _first_token_time(self) -> float:
+        if self.slow_rate and random.random() < self.slow_rate:
+            return self.latency + self.slow_latency
+        return self.latency
+
+    def _generation_time(self) -> float:
+        return len(self._words()) / self.token_rate if self.token_rate else 0.0
+
+    def _message(self, prompt) -> AIMessage:
+        return AIMessage(
+            content=self.reply,
+            usage_metadata={
+                "input_tokens": len(str(prompt)) // 4,
+                "output_tokens": len(self._words()),
+                "total_tokens": len(str(prompt)) // 4 + len(self._words()),
+            },
+        )
+
+    def invoke(self, prompt, **kwargs):
+        time.sleep(self._first_token_time() + self._generation_time())
+        self._maybe_fail()
+        return self._message(prompt)
+
+    async def ainvoke(self, prompt, **kwargs):
+        await asyncio.sleep(self._first_token_time() + self._generation_time())
+        self._maybe_fail()
+        return self._message(prompt)
+
+    async def astream(self, prompt, **kwargs):
+        words = self._words()
+        await asyncio.sleep(self._first_token_time())
+        self._maybe_fail()
+        for word in words:
+            if self.token_rate:
+                await asyncio.sleep(1 / self.token_rate)
+            yield AIMessageChunk(content=word)
+
+
+class FakeEmbeddings:
+    """Mimics the instructor-large embedding calls with a blocking delay."""
+
+    def __init__(self, latency: float = 0.03, dimensions: int = 768):
+        self.latency = latency
+        self.dimensions = dimensions
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return self._vector(text)
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency * max(1, len(texts)) ** 0.5)
+        return [self._vector(text) for text in texts]
+
+    def _vector(self, text):
+        rng = random.Random(text)
+        return [rng.uniform(-1, 1) for _ in range(self.dimensions)]
+
+
+class FakeVectorStore:
+    """Mimics the Chroma search calls with a blocking, CPU-like delay."""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+
+    def _documents(self, k):
+        return [
+            Document(
+                page_content=f"Section {i}: placeholder statute text.",
+                metadata={"source": "PDFS/BNS.pdf", "page": i, "id": f"PDFS/BNS.pdf:{i}:0"},
+            )
+            for i in range(k)
+        ]
+
+    def get(self, ids=None, include=None, **kwargs):
+        documents = [doc for doc in self._documents(50) if doc.metadata["id"] in (ids or [])]
+        return {
+            "ids": [doc.metadata["id"] for doc in documents],
+            "documents": [doc.page_content for doc in documents],
+            "metadatas": [doc.metadata for doc in documents],
+        }
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k=4, **kwargs):
+        time.sleep(self.latency)
+        return [(doc, 0.0) for doc in self._documents(k)]
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k=4, fetch_k=20, **kwargs):
+        time.sleep(self.latency)
+        return self._documents(k)
+
+
+async def fake_translate(text, lang, latency: float = 0.5):
+    await asyncio.sleep(latency)
+    return text
+
+
+async def fake_synthesize(text, voice_model):
+    """Writes a few placeholder bytes into the audio cache instead of calling edge-tts."""
+    from audio_cache import audio_cache
+    from multilingual import TTS_RATE
+
+    await asyncio.sleep(0.01)
+    key = audio_cache.key(text, voice_model, TTS_RATE)
+    audio = b"\xff\xf3"
+    with open(audio_cache.path_for(key), "wb") as f:
+        f.write(audio)
+    return key, audio
+
+
+def temporary_chroma_path() -> str:
+    """
+    Points CHROMA_PATH at a fresh temporary directory for `fake_store`. The
+    store path is read when vector.py is imported, so call this first.
+    """
+    path = tempfile.mkdtemp(prefix="bench_chroma_")
+    os.environ["CHROMA_PATH"] = path
+    return path
+
+
+def fixture_directory(source: str, files: int, destination: str) -> list[str]:
+    """Copies the `files` smallest acts, so runs are quick and always ingest the same input."""
+    names = sorted(
+        (name for name in os.listdir(source) if name.lower().endswith(".pdf")),
+        key=lambda name: (os.path.getsize(os.path.join(source, name)), name),
+    )[:files]
+    for name in names:
+        shutil.copy(os.path.join(source, name), os.path.join(destination, name))
+    return names
+
+
+@contextmanager
+def fake_store(files: int, source: str = "PDFS"):
+    """
+    Ingests the `files` smallest acts with FakeEmbeddings into the temporary
+    store set up by `temporary_chroma_path`, yields `(vector_store,
+    embeddings)`, and deletes the store afterwards.
+    """
+    from ingest import ingest_directory
+    from vector import CHROMA_PATH, get_vector_store
+
+    if not os.path.basename(CHROMA_PATH).startswith("bench_chroma_"):
+        raise RuntimeError("Call temporary_chroma_path() before importing vector.")
+    try:
+        embeddings = FakeEmbeddings(latency=0.0)
+        vector_store = get_vector_store(embedding_function=embeddings)
+        with tempfile.TemporaryDirectory() as directory:
+            fixture_directory(source, files, directory)
+            ingest_directory(directory, vector_store=vector_store)
+        yield vector_store, embeddings
+    finally:
+        shutil.rmtree(CHROMA_PATH, ignore_errors=True)
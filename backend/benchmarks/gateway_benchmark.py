@@ -0,0 +1,87 @@
+"""
+Drives the LLM gateway directly against the fake Gemini model: a burst of
+calls with injected 429s and slow responses, with and without hedging.
+
+Reports end-to-end latency, how long calls queued for quota and slots versus
+how long they spent in the model, and the retry and hedge counts.
+
+Usage (from the backend directory):
+    python -m benchmarks.gateway_benchmark --calls 200 --rpm 600 --error-rate 0.05
+    python -m benchmarks.gateway_benchmark --slow-rate 0.05 --slow-latency 3 --hedge-after 0.6
+"""
+import argparse
+import asyncio
+import time
+
+import startup
+from benchmarks.fakes import FakeChatModel
+from benchmarks.report import emit, latency_summary
+from llm_gateway import LLMGateway
+
+
+async def burst(gateway: LLMGateway, calls: int) -> dict:
+    latencies, failures = [], 0
+
+    async def one(i):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            await gateway.ainvoke(f"Question {i}: what is the punishment for theft?")
+        except Exception:
+            failures += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return {
+        "calls": calls,
+        "failures": failures,
+        "wall_seconds": round(time.perf_counter() - start, 2),
+        **(latency_summary(latencies) if latencies else {}),
+        **gateway.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--rpm", type=float, default=1200)
+    parser.add_argument("--tpm", type=float, default=0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    parser.add_argument("--hedge-after", type=float, default=1.0)
+    parser.add_argument("--output", help="Also write the JSON result to this file.")
+    args = parser.parse_args()
+
+    startup.override(
+        "chat_model",
+        FakeChatModel(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            slow_rate=args.slow_rate,
+            slow_latency=args.slow_latency,
+        ),
+    )
+
+    async def run():
+        results = {}
+        for name, hedge_after in (("unhedged", 0.0), ("hedged", args.hedge_after)):
+            gateway = LLMGateway(
+                "chat_model",
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                max_concurrency=args.concurrency,
+                hedge_after=hedge_after,
+            )
+            results[name] = await burst(gateway, args.calls)
+        return results
+
+    emit(asyncio.run(run()), args.output)
+
+
+if __name__ == "__main__":
+    main()
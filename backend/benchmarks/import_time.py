@@ -0,0 +1,58 @@
+"""
+Checks that importing the app stays within a time budget.
+
+Heavy dependencies (torch, sentence-transformers, chromadb, the Gemini
+client) must be loaded lazily by `startup`, not at import. This imports `app`
+in a fresh interpreter, fails if it takes longer than the budget, and lists
+the slowest imports to show what regressed.
+
+Usage (from the backend directory):
+    python -m benchmarks.import_time --budget 2.0
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--budget", type=float, default=float(os.getenv("IMPORT_BUDGET_SECONDS", "2.0"))
+    )
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    env = {**os.environ, "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "benchmark")}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    elapsed = time.perf_counter() - start
+
+    if completed.returncode != 0:
+        sys.exit(f"Importing app failed:\n{completed.stderr[-2000:]}")
+
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    timings = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        timings.append((int(cumulative), name.strip()))
+
+    print(f"import app: {elapsed:.2f}s (budget {args.budget:.2f}s)")
+    print("slowest imports (cumulative):")
+    for cumulative, name in sorted(timings, reverse=True)[: args.top]:
+        print(f"  {cumulative / 1e6:7.3f}s  {name}")
+
+    if elapsed > args.budget:
+        sys.exit(f"Import time {elapsed:.2f}s exceeds the {args.budget:.2f}s budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Ingestion throughput: a cold ingest of fixture acts from PDFS/ into an empty
+store, then a re-run over the unchanged files (the incremental no-op path).
+
+Ingestion writes to a temporary CHROMA_PATH, so the real store, manifest and
+lexical index are untouched. Embeddings are faked unless --real-embeddings is
+given, in which case the configured EMBEDDING_BACKEND is used.
+
+Usage (from the backend directory):
+    python -m benchmarks.ingest_benchmark --files 3
+"""
+import argparse
+import shutil
+import tempfile
+
+from benchmarks.fakes import FakeEmbeddings, fixture_directory, temporary_chroma_path
+from benchmarks.report import emit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", default="PDFS")
+    parser.add_argument("--files", type=int, default=3)
+    parser.add_argument("--real-embeddings", action="store_true")
+    parser.add_argument("--output", help="Also write the JSON result to this file.")
+    args = parser.parse_args()
+
+    store = temporary_chroma_path()
+    from ingest import ingest_directory
+    from vector import get_vector_store
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            names = fixture_directory(args.source, args.files, directory)
+            embedding_function = None if args.real_embeddings else FakeEmbeddings(latency=0.01)
+            vector_store = get_vector_store(embedding_function=embedding_function)
+
+            cold = ingest_directory(directory, vector_store=vector_store)
+            unchanged = ingest_directory(directory, vector_store=vector_store)
+    finally:
+        shutil.rmtree(store, ignore_errors=True)
+
+    emit(
+        {
+            "files": names,
+            "embeddings": "real" if args.real_embeddings else "fake",
+            "cold": cold,
+            "unchanged": unchanged,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
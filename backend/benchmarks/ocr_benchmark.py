@@ -0,0 +1,96 @@
+"""
+OCR throughput on multi-page scanned PDFs: the old serial path versus the
+page-parallel OCR pool.
+
+Scanned fixtures are made from the acts in PDFS/ by rasterizing their first
+pages into an image-only PDF, so there is no text layer and every page goes
+through tesseract.
+
+Usage (from the backend directory):
+    python -m benchmarks.ocr_benchmark --pages 10 --jobs 2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+import pytesseract
+from pdf2image import convert_from_path
+
+import ocr_processor
+from benchmarks.report import emit
+
+
+def make_scanned_pdf(source: str, pages: int, dpi: int, output: str):
+    with fitz.open(source) as original, fitz.open() as scanned:
+        for page in original.pages(0, min(pages, original.page_count)):
+            pixmap = page.get_pixmap(dpi=dpi)
+            new_page = scanned.new_page(width=page.rect.width, height=page.rect.height)
+            new_page.insert_image(new_page.rect, pixmap=pixmap)
+        scanned.save(output)
+
+
+def serial_ocr(path: str) -> int:
+    """The pre-pool path: rasterize every page up front, then OCR them in turn."""
+    images = convert_from_path(path)
+    for image in images:
+        pytesseract.image_to_string(image)
+    return len(images)
+
+
+async def pooled_ocr(paths: list[str]):
+    results = await asyncio.gather(
+        *(ocr_processor.process_file_to_text_async(path) for path in paths)
+    )
+    for success, content in results:
+        if not success:
+            raise RuntimeError(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", default=os.path.join("PDFS", "Limitation Act 1963.pdf"))
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--jobs", type=int, default=2, help="Concurrent uploads.")
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument(
+        "--skip-serial", action="store_true", help="Only time the pooled path (the serial one is slow)."
+    )
+    parser.add_argument("--output", help="Also write the JSON result to this file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(args.jobs):
+            path = os.path.join(directory, f"scan_{i}.pdf")
+            make_scanned_pdf(args.source, args.pages, args.dpi, path)
+            paths.append(path)
+
+        serial = None
+        if not args.skip_serial:
+            start = time.perf_counter()
+            serial_ocr_pages = sum(serial_ocr(path) for path in paths)
+            serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        asyncio.run(pooled_ocr(paths))
+        pooled = time.perf_counter() - start
+
+    with fitz.open(args.source) as source:
+        pages = min(args.pages, source.page_count) * args.jobs
+    result = {
+        "pages": pages,
+        "jobs": args.jobs,
+        "ocr_workers": ocr_processor.OCR_WORKERS,
+        "pooled_pages_per_sec": round(pages / pooled, 2),
+    }
+    if serial is not None:
+        result["serial_pages_per_sec"] = round(serial_ocr_pages / serial, 2)
+        result["speedup"] = round(serial / pooled, 2)
+    emit(result, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Helpers shared by the benchmarks for summarizing and emitting results."""
+import json
+import statistics
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    """p50/p95/p99/mean of a list of latencies in seconds, reported in milliseconds."""
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+    }
+
+
+def emit(result: dict, output: str | None = None):
+    """Prints the result as JSON, and writes it to `output` when given (used by the suite)."""
+    text = json.dumps(result, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
@@ -0,0 +1,96 @@
+"""
+Retrieval latency per search setting: similarity search at several k, MMR
+at several (k, fetch_k), and the BM25 search used by hybrid retrieval.
+
+Query vectors are computed once up front, so the timings are the vector
+store's alone; embedding latency is reported separately. By default the
+configured store under CHROMA_PATH is searched. With --fake, fixture acts are
+ingested with fake embeddings into a temporary store, which needs no model
+download and measures Chroma's own search cost.
+
+Usage (from the backend directory):
+    python -m benchmarks.retrieval_benchmark --repeat 5
+    python -m benchmarks.retrieval_benchmark --fake --files 3
+"""
+import argparse
+import sys
+import time
+from contextlib import nullcontext
+
+from benchmarks.fakes import fake_store, temporary_chroma_path
+
+if "--fake" in sys.argv:
+    temporary_chroma_path()
+
+from benchmarks.report import emit, latency_summary
+from benchmarks.retrieval_quality import QUESTIONS
+from hybrid_index import LexicalIndex
+from vector import get_embedding_function, get_vector_store
+
+SIMILARITY_K = (3, 5, 7, 10, 15)
+MMR_SETTINGS = ((5, 10), (5, 20), (5, 40), (7, 28))
+BM25_CANDIDATES = (10, 20, 50)
+
+
+def time_calls(call, vectors, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        for vector in vectors:
+            start = time.perf_counter()
+            call(vector)
+            latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fake", action="store_true")
+    parser.add_argument("--files", type=int, default=3, help="Acts to ingest with --fake.")
+    parser.add_argument("--output", help="Also write the JSON result to this file.")
+    args = parser.parse_args()
+
+    if args.fake:
+        store = fake_store(args.files)
+    else:
+        embeddings = get_embedding_function()
+        store = nullcontext((get_vector_store(embedding_function=embeddings), embeddings))
+
+    with store as (vector_store, embeddings):
+        vectors, embedding_latencies = [], []
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            vectors.append(embeddings.embed_query(question))
+            embedding_latencies.append(time.perf_counter() - start)
+        embedding = latency_summary(embedding_latencies)
+        # The first search loads the HNSW index; keep it out of the timings.
+        vector_store.similarity_search_by_vector(vectors[0], k=1)
+
+        results = {"queries": len(QUESTIONS), "repeat": args.repeat, "embedding": embedding}
+        for k in SIMILARITY_K:
+            results[f"similarity_k{k}"] = time_calls(
+                lambda vector: vector_store.similarity_search_by_vector_with_relevance_scores(vector, k=k),
+                vectors,
+                args.repeat,
+            )
+        for k, fetch_k in MMR_SETTINGS:
+            results[f"mmr_k{k}_fetch{fetch_k}"] = time_calls(
+                lambda vector: vector_store.max_marginal_relevance_search_by_vector(
+                    vector, k=k, fetch_k=fetch_k
+                ),
+                vectors,
+                args.repeat,
+            )
+
+        lexical_index = LexicalIndex.load()
+        lexical_index.search("warm up", 1)
+        for n in BM25_CANDIDATES:
+            results[f"bm25_n{n}"] = time_calls(
+                lambda question: lexical_index.search(question, n), QUESTIONS, args.repeat
+            )
+
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
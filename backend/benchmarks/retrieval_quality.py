@@ -0,0 +1,119 @@
+"""
+Retrieval-quality regression harness for the embedding backends.
+
+Each backend runs in its own subprocess (so its RSS is measured in isolation)
+and answers a fixed set of legal questions against its own Chroma collection.
+The fp32 backend's top-k chunk ids are the reference; every other backend is
+scored by recall@k against them, alongside model load time, query latency and
+peak RSS.
+
+Ingest each backend first, e.g. `EMBEDDING_BACKEND=int8 python ingest.py`.
+
+Usage (from the backend directory):
+    python -m benchmarks.retrieval_quality --backends fp32 int8 onnx small --k 7
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+QUESTIONS = [
+    "What is the punishment for theft?",
+    "What is the punishment for murder?",
+    "When can a perpetual injunction be granted?",
+    "What is the limitation period for a suit for recovery of money lent?",
+    "What are the essentials of a valid contract?",
+    "When is a contract voidable at the option of a party?",
+    "Who may apply for registration of a trade mark?",
+    "What are the grounds for refusal of a patent?",
+    "What documents must be compulsorily registered?",
+    "What is criminal breach of trust?",
+    "When can the police arrest without a warrant?",
+    "What are the conditions for granting bail in a non-bailable offence?",
+    "What is the procedure for filing a consumer complaint?",
+    "Who is liable as an occupier under the Factories Act?",
+    "What are the duties of directors of a company?",
+    "What is the penalty for hunting a wild animal?",
+    "What constitutes a public servant taking a bribe?",
+    "How is citizenship acquired by registration?",
+    "What is the effect of an arbitral award?",
+    "Who is entitled to free legal services?",
+]
+
+
+def measure(backend: str, k: int) -> dict:
+    """Runs inside the per-backend subprocess."""
+    from vector import get_vector_store
+
+    start = time.perf_counter()
+    vector_store = get_vector_store(backend=backend)
+    vector_store.similarity_search("warm up", k=1)
+    load_seconds = time.perf_counter() - start
+
+    latencies, results = [], []
+    for question in QUESTIONS:
+        start = time.perf_counter()
+        documents = vector_store.similarity_search(question, k=k)
+        latencies.append(time.perf_counter() - start)
+        results.append([doc.metadata.get("id") for doc in documents])
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "mean_query_ms": round(statistics.mean(latencies) * 1000, 1),
+        "p50_query_ms": round(statistics.median(latencies) * 1000, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }
+
+
+def recall_at_k(reference: list[list[str]], candidate: list[list[str]]) -> float:
+    scores = [
+        len(set(expected) & set(got)) / len(expected)
+        for expected, got in zip(reference, candidate)
+        if expected
+    ]
+    return round(statistics.mean(scores), 3) if scores else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", nargs="+", default=["fp32", "int8", "onnx", "small"])
+    parser.add_argument("--k", type=int, default=7)
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.k)))
+        return
+
+    runs = {}
+    for backend in dict.fromkeys(["fp32", *args.backends]):
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.retrieval_quality", "--measure", backend, "--k", str(args.k)],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            print(f"{backend}: failed\n{completed.stderr[-2000:]}", file=sys.stderr)
+            continue
+        runs[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    if "fp32" not in runs:
+        sys.exit("The fp32 baseline failed; cannot compute recall.")
+
+    reference = runs["fp32"]["results"]
+    report = []
+    for run in runs.values():
+        summary = {key: value for key, value in run.items() if key != "results"}
+        summary[f"recall@{args.k}"] = recall_at_k(reference, run["results"])
+        report.append(summary)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Runs the offline benchmarks and writes one JSON report that can be compared
+with earlier runs.
+
+Each benchmark runs in its own subprocess, so fakes and overrides installed by
+one cannot leak into another. The report records the git commit and the
+environment settings the code reads, so two reports can be told apart.
+
+Usage (from the backend directory):
+    python -m benchmarks.suite --output benchmarks/results/after.json
+    python -m benchmarks.suite --quick --compare benchmarks/results/before.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# Benchmark name -> (module, arguments, quick arguments).
+BENCHMARKS = {
+    "ingestion": ("benchmarks.ingest_benchmark", ["--files", "3"], ["--files", "1"]),
+    "retrieval": ("benchmarks.retrieval_benchmark", ["--fake", "--files", "3"], ["--fake", "--files", "1", "--repeat", "1"]),
+    "act_filter": ("benchmarks.act_filter_benchmark", ["--fake", "--files", "3"], ["--fake", "--files", "1", "--repeat", "1"]),
+    "ann": (
+        "benchmarks.ann_eval",
+        ["--fake", "--files", "3"],
+        ["--fake", "--files", "1", "--m", "16", "--construction-ef", "100", "--search-ef", "10", "50", "--queries", "20"],
+    ),
+    "ocr": ("benchmarks.ocr_benchmark", ["--pages", "10", "--jobs", "2", "--skip-serial"], ["--pages", "2", "--jobs", "1", "--skip-serial"]),
+    "gateway": ("benchmarks.gateway_benchmark", [], ["--calls", "40", "--latency", "0.05", "--slow-latency", "0.5", "--hedge-after", "0.1"]),
+    "endpoints": (
+        "benchmarks.concurrency_benchmark",
+        ["--requests", "50", "--concurrency", "10", "--fake-retrieval", "--token-rate", "50", "--streams"],
+        ["--requests", "5", "--concurrency", "5", "--fake-retrieval", "--llm-latency", "0.1"],
+    ),
+}
+
+# Settings that change the measured numbers; recorded with every report.
+RECORDED_ENV_PREFIXES = (
+    "EMBEDDING_", "OCR_", "PAGE_", "RETRIEVAL_", "INGEST_", "EMBED_", "CONTEXT_",
+    "AUDIO_", "TTS_", "GENERATION_MODE", "LEXICAL_", "MAP_", "UPLOAD_", "HNSW_",
+    "HUMAN_", "PROFESSIONAL_",
+)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(name: str, quick: bool) -> dict:
+    module, arguments, quick_arguments = BENCHMARKS[name]
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "result.json")
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-m", module, *(quick_arguments if quick else arguments), "--output", output],
+            capture_output=True,
+            text=True,
+        )
+        seconds = round(time.perf_counter() - start, 2)
+        if completed.returncode != 0 or not os.path.exists(output):
+            print(f"{name}: failed\n{completed.stderr[-2000:]}", file=sys.stderr)
+            return {"error": completed.stderr[-2000:], "seconds": seconds}
+        with open(output) as f:
+            return {**json.load(f), "seconds": seconds}
+
+
+def flatten(value, prefix: str = "") -> dict:
+    """Numeric leaves of a report keyed by their dotted path."""
+    if isinstance(value, dict):
+        flat = {}
+        for key, child in value.items():
+            flat.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare(baseline: dict, current: dict):
+    """Prints every metric present in both reports with its relative change."""
+    before = flatten(baseline["results"])
+    after = flatten(current["results"])
+    print(f"{'metric':<70} {'before':>12} {'after':>12} {'change':>8}")
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{key:<70} {old:>12} {new:>12} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="Small inputs, for a smoke run.")
+    parser.add_argument("--output", help="Where to write the report.")
+    parser.add_argument("--compare", help="An earlier report to compare against.")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "quick": args.quick,
+        "env": {
+            key: value
+            for key, value in sorted(os.environ.items())
+            if key.startswith(RECORDED_ENV_PREFIXES)
+        },
+        "results": {},
+    }
+    for name in args.only:
+        print(f"Running {name} benchmark...", file=sys.stderr)
+        report["results"][name] = run_benchmark(name, args.quick)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
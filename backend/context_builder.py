@@ -0,0 +1,187 @@
+"""
+Assembles retrieved chunks into the CONTEXT block of a prompt.
+
+Retrieval often returns neighbouring chunks of the same page, which overlap
+by the splitter's 80 characters, and near-identical provisions repeated
+across acts or amendments. Before prompting, chunks are:
+
+1. merged with their neighbours from the same `source:page`, dropping the
+   overlapping text;
+2. dropped if they are near-duplicates of a more relevant chunk;
+3. packed in relevance order while they fit the token budget;
+4. labelled with their act and page so the model can cite them.
+"""
+import os
+import re
+
+from statutes import ACTS, act_for_source
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+
+# Gemini averages roughly four characters of English per token.
+CHARS_PER_TOKEN = 4
+MAX_OVERLAP_CHARS = 200
+MIN_OVERLAP_CHARS = 20
+
+WORD = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack(documents, budget_tokens: int):
+    """
+    Keeps documents in order while they fit the token budget. A document too
+    large for what is left is skipped, so an oversized top result does not
+    leave the prompt without context.
+    """
+    packed, used = [], 0
+    for doc in documents:
+        cost = estimate_tokens(doc.page_content)
+        if used + cost > budget_tokens:
+            continue
+        packed.append(doc)
+        used += cost
+    return packed
+
+
+def _position(doc) -> tuple[str, int] | None:
+    """(source:page, chunk index) parsed from the chunk id, if it has one."""
+    chunk_id = doc.metadata.get("id")
+    if not chunk_id:
+        return None
+    page_id, _, index = chunk_id.rpartition(":")
+    return (page_id, int(index)) if index.isdigit() else None
+
+
+def _join(first: str, second: str) -> str:
+    """Concatenates consecutive chunks, removing the text they share."""
+    for size in range(min(len(first), len(second), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return first + "\n" + second
+
+
+class _Block:
+    def __init__(self, doc):
+        self.metadata = doc.metadata
+        self.page_content = doc.page_content
+        self.ids = [doc.metadata.get("id")]
+        position = _position(doc)
+        self.page_id = position[0] if position else None
+        self.first = self.last = position[1] if position else None
+
+    def try_merge(self, doc) -> bool:
+        position = _position(doc)
+        if position is None or self.page_id is None or position[0] != self.page_id:
+            return False
+        if position[1] == self.last + 1:
+            self.page_content = _join(self.page_content, doc.page_content)
+            self.last = position[1]
+            self.ids.append(doc.metadata.get("id"))
+            return True
+        if position[1] == self.first - 1:
+            self.page_content = _join(doc.page_content, self.page_content)
+            self.first = position[1]
+            self.ids.insert(0, doc.metadata.get("id"))
+            return True
+        return False
+
+
+def merge_adjacent(documents) -> list[_Block]:
+    """
+    Merges each chunk into an earlier block of consecutive chunks from the
+    same page where possible. Blocks keep the rank of their most relevant chunk.
+    """
+    blocks = []
+    for doc in documents:
+        if not any(block.try_merge(doc) for block in blocks):
+            blocks.append(_Block(doc))
+    return blocks
+
+
+def _shingles(text: str) -> set:
+    words = WORD.findall(text.lower())
+    return {tuple(words[i : i + 3]) for i in range(max(1, len(words) - 2))}
+
+
+def drop_near_duplicates(blocks: list[_Block]) -> list[_Block]:
+    kept, kept_shingles = [], []
+    for block in blocks:
+        shingles = _shingles(block.page_content)
+        if any(
+            len(shingles & other) / (len(shingles | other) or 1) >= NEAR_DUPLICATE_THRESHOLD
+            for other in kept_shingles
+        ):
+            continue
+        kept.append(block)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def _describe(block: _Block) -> dict:
+    source = block.metadata.get("source")
+    page = block.metadata.get("page")
+    act = ACTS.get(act_for_source(source))
+    return {
+        "source": source,
+        "page": page,
+        "act": f"{act['name']}, {act['year']}" if act else None,
+        "ids": block.ids,
+    }
+
+
+def _label(number: int, source: dict) -> str:
+    name = source["act"] or os.path.basename(source["source"] or "Unknown source")
+    page = f", page {source['page'] + 1}" if isinstance(source["page"], int) else ""
+    return f"[{number}] {name}{page}"
+
+
+class ContextStats:
+    """Running totals of prompt sizes, to track what merging and packing save."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retrieved_tokens = 0
+        self.context_tokens = 0
+        self.prompt_tokens = 0
+        self.model_input_tokens = 0
+
+    def record_context(self, retrieved_tokens: int, context_tokens: int):
+        self.retrieved_tokens += retrieved_tokens
+        self.context_tokens += context_tokens
+
+    def record_prompt(self, prompt_tokens: int, model_input_tokens: int | None):
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.model_input_tokens += model_input_tokens or 0
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retrieved_tokens": self.retrieved_tokens,
+            "context_tokens": self.context_tokens,
+            "saved_tokens": self.retrieved_tokens - self.context_tokens,
+            "prompt_tokens_estimated": self.prompt_tokens,
+            "model_input_tokens": self.model_input_tokens,
+        }
+
+
+context_stats = ContextStats()
+
+
+def build_context(documents, budget_tokens: int = CONTEXT_TOKEN_BUDGET) -> tuple[str, list[dict]]:
+    """Returns the CONTEXT text and the sources it cites, in the same order."""
+    blocks = pack(drop_near_duplicates(merge_adjacent(documents)), budget_tokens)
+    sources = [_describe(block) for block in blocks]
+    context_text = "\n\n---\n\n".join(
+        f"{_label(number, source)}\n{block.page_content}"
+        for number, (block, source) in enumerate(zip(blocks, sources), start=1)
+    )
+
+    retrieved_tokens = sum(estimate_tokens(doc.page_content) for doc in documents)
+    context_tokens = estimate_tokens(context_text)
+    context_stats.record_context(retrieved_tokens, context_tokens)
+    return context_text, sources
@@ -0,0 +1,98 @@
+import asyncio
+import os
+from collections import Counter
+
+from executors import run_blocking
+
+EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class BatchingEmbedder:
+    """
+    Coalesces concurrent query embeddings into batched forward passes.
+
+    Callers await `embed_query`; their texts are queued and a single worker
+    drains the queue, waiting at most `max_wait_ms` after the first text for
+    others to arrive (up to `max_batch_size`), then embeds them together on
+    the retrieval pool and resolves each caller's future with its vector.
+    While a batch is running, new requests accumulate for the next one, so
+    batches grow naturally with load.
+    """
+
+    def __init__(self, embeddings, max_batch_size: int, max_wait_ms: float):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.worker = None
+        self.batches = 0
+        self.texts = 0
+        self.batch_sizes = Counter()
+
+    async def embed_query(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue()
+            self.worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        self.queue.put_nowait((text, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Drop callers that gave up while waiting rather than embed for nobody.
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            self._record(len(batch))
+            try:
+                # With the default encode settings embed_documents encodes
+                # exactly as embed_query does, just for many texts at once.
+                vectors = await run_blocking(
+                    self.embeddings.embed_documents, [text for text, _future in batch]
+                )
+            except Exception as e:
+                for _text, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_text, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def _record(self, size: int):
+        self.batches += 1
+        self.texts += size
+        bucket = next((b for b in BATCH_SIZE_BUCKETS if size <= b), "inf")
+        self.batch_sizes[bucket] += 1
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            # Non-cumulative: each bucket counts batches larger than the previous bound.
+            "batch_size_histogram": {
+                str(bucket): self.batch_sizes[bucket]
+                for bucket in (*BATCH_SIZE_BUCKETS, "inf")
+            },
+        }
@@ -0,0 +1,21 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Embedding the query and searching Chroma are CPU-bound and synchronous.
+# They run on this bounded pool so the event loop stays free to serve other
+# requests while a search is in progress.
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+
+retrieval_executor = ThreadPoolExecutor(
+    max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval"
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking callable on the retrieval pool and awaits its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        retrieval_executor, functools.partial(func, *args, **kwargs)
+    )
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+EXTRACTION_CACHE_PATH = os.getenv(
+    "EXTRACTION_CACHE_PATH", os.path.join(BASE_DIR, "cache", "extractions.sqlite")
+)
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+
+class ExtractionCache:
+    """
+    Extracted text of previously uploaded files, keyed by the sha256 of the
+    upload's bytes plus the OCR settings that produced it.
+
+    Backed by SQLite so it is shared by all workers on the host and survives
+    restarts. When the stored text exceeds `max_bytes`, the least recently
+    used entries are deleted. Each call opens (and closes) its own
+    connection, so the cache can be used from any thread.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # This process's estimate of the stored size. Other workers write too,
+        # so it is recounted exactly before anything is evicted.
+        self._total = None
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                " key TEXT PRIMARY KEY,"
+                " text TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """A connection that commits (or rolls back) on exit and is always closed."""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> str | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE extractions SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, text: str):
+        size = len(text.encode("utf-8"))
+        with self._connect() as conn:
+            replaced = conn.execute(
+                "SELECT size FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, text, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time()),
+            )
+            if self._total is None:
+                self._total = self._stored_size(conn)
+            else:
+                self._total += size - (replaced[0] if replaced else 0)
+            if self._total > self.max_bytes:
+                self._evict(conn)
+
+    @staticmethod
+    def _stored_size(conn) -> int:
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()
+        return total
+
+    def _evict(self, conn):
+        total = self._stored_size(conn)
+        self._total = total
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM extractions ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+            total -= size
+        self._total = total
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+extraction_cache = ExtractionCache(
+    path=EXTRACTION_CACHE_PATH, max_bytes=EXTRACTION_CACHE_MAX_BYTES
+)
@@ -0,0 +1,20 @@
+# Run with: gunicorn -c gunicorn.conf.py app:app
+#
+# The app is imported in the master process and the embedding model is loaded
+# there before workers are forked, so all workers share one copy-on-write copy
+# of the weights instead of each loading their own. Chroma and the Gemini
+# client hold sqlite connections and gRPC channels that must not cross a
+# fork, so each worker still creates those itself during its own warm-up.
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+
+
+def when_ready(server):
+    import startup
+
+    startup.preload()
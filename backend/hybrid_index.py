@@ -0,0 +1,214 @@
+"""
+Lexical retrieval alongside the Chroma store.
+
+`LexicalIndex` keeps, for every chunk, its term frequencies and the statute
+citations it contains (section headings such as "302. Punishment for
+murder", and CPC orders). From these it builds a BM25 inverted index and an
+exact citation index keyed by (act, citation). Both are built during
+ingestion and persisted with the chunks next to the Chroma store, so server
+processes load them rather than rebuild them. A loaded index remembers the
+corpus version it was read at, so the server can reload it once an ingest
+has changed the corpus.
+"""
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter, defaultdict
+
+from statutes import act_for_source, acts_in_query
+from vector import CHROMA_PATH, corpus_version
+
+LEXICAL_INDEX_PATH = os.path.join(CHROMA_PATH, "lexical_index.pickle")
+
+# Bumped when the pickled layout changes; older files are rebuilt on load.
+INDEX_FORMAT = 2
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "any", "are", "as", "at", "be", "by", "for", "from", "has",
+    "have", "in", "is", "it", "its", "of", "on", "or", "shall", "such", "that",
+    "the", "this", "to", "under", "was", "what", "which", "with", "who", "whom",
+}
+
+# Section headings in the bare acts start a line: "302. Punishment for murder.—"
+SECTION_HEADING = re.compile(r"^\s*(\d{1,4}[A-Z]{0,3})\.\s*[\[(]?[A-Z]", re.MULTILINE)
+ORDER_HEADING = re.compile(r"\bORDER\s+([IVXLC]+)\b")
+CHAPTER_HEADING = re.compile(r"^\s*CHAPTER\s+([IVXLC]+[A-Z]?)\b", re.MULTILINE)
+
+QUERY_SECTION = re.compile(
+    r"\b(?:sections?|secs?\.?|s\.|u/s\.?)\s*(\d{1,4}[a-z]{0,3})\b", re.IGNORECASE
+)
+QUERY_ORDER = re.compile(r"\border\s+([ivxlc]+)\b", re.IGNORECASE)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def chunk_citations(text: str) -> list[str]:
+    citations = [f"section:{number.upper()}" for number in SECTION_HEADING.findall(text)]
+    citations += [f"order:{number.upper()}" for number in ORDER_HEADING.findall(text)]
+    return list(dict.fromkeys(citations))
+
+
+def query_citations(query_text: str) -> list[str]:
+    citations = [f"section:{number.upper()}" for number in QUERY_SECTION.findall(query_text)]
+    citations += [f"order:{number.upper()}" for number in QUERY_ORDER.findall(query_text)]
+    return list(dict.fromkeys(citations))
+
+
+def reciprocal_rank_fusion(*rankings: list[str]) -> list[str]:
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] += 1 / (RRF_K + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class LexicalIndex:
+    def __init__(self, chunks: dict | None = None):
+        # chunk id -> {"length": int, "tf": {term: count}, "act": str | None, "citations": [str]}
+        self.chunks = chunks or {}
+        self.corpus_version = None
+        self._postings = None
+        self._build_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = LEXICAL_INDEX_PATH) -> "LexicalIndex":
+        """
+        Loads the chunks together with the postings and citation index built
+        at ingestion, so a server process does not rebuild them. A file in an
+        older format has only the chunks; it is rebuilt on first search.
+        """
+        # Read before the index: ingestion saves the index first and bumps the
+        # version after, so a load racing an ingest is only ever marked stale.
+        version = corpus_version()
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            data = {}
+
+        if data.get("format") == INDEX_FORMAT:
+            index = cls(data["chunks"])
+            index._average_length = data["average_length"]
+            index._citations = data["citations"]
+            index._postings = data["postings"]
+        else:
+            index = cls(data)
+        index.corpus_version = version
+        return index
+
+    def save(self, path: str = LEXICAL_INDEX_PATH):
+        self._ensure_built()
+        data = {
+            "format": INDEX_FORMAT,
+            "chunks": self.chunks,
+            "postings": dict(self._postings),
+            "citations": dict(self._citations),
+            "average_length": self._average_length,
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def add(self, chunk_id: str, text: str, source: str | None):
+        tokens = tokenize(text)
+        self.chunks[chunk_id] = {
+            "length": len(tokens),
+            "tf": dict(Counter(tokens)),
+            "act": act_for_source(source),
+            "citations": chunk_citations(text),
+        }
+        self._postings = None
+
+    def remove(self, chunk_ids):
+        for chunk_id in chunk_ids:
+            self.chunks.pop(chunk_id, None)
+        self._postings = None
+
+    def has_all(self, chunk_ids) -> bool:
+        return all(chunk_id in self.chunks for chunk_id in chunk_ids)
+
+    def _ensure_built(self):
+        # Searches run on several threads; only the first builds the index.
+        if self._postings is None:
+            with self._build_lock:
+                if self._postings is None:
+                    self._build()
+
+    def _build(self):
+        postings = defaultdict(list)
+        citations = defaultdict(list)
+        for chunk_id, chunk in self.chunks.items():
+            for term, count in chunk["tf"].items():
+                postings[term].append((chunk_id, count))
+            for citation in chunk["citations"]:
+                citations[(chunk["act"], citation)].append(chunk_id)
+                citations[(None, citation)].append(chunk_id)
+
+        lengths = [chunk["length"] for chunk in self.chunks.values()]
+        self._average_length = sum(lengths) / len(lengths) if lengths else 0.0
+        self._citations = citations
+        self._postings = postings
+
+    def search(self, query_text: str, n: int, acts: list[str] | None = None) -> list[tuple[str, float]]:
+        """
+        The top `n` chunks by BM25 score for the query's terms, only from
+        `acts` when given and any of their chunks match.
+        """
+        self._ensure_built()
+
+        total = len(self.chunks)
+        scores = defaultdict(float)
+        for term in set(tokenize(query_text)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, count in postings:
+                length = self.chunks[chunk_id]["length"]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self._average_length or 1))
+                scores[chunk_id] += idf * count * (BM25_K1 + 1) / (count + norm)
+
+        if acts:
+            scoped = {
+                chunk_id: score for chunk_id, score in scores.items()
+                if self.chunks[chunk_id]["act"] in acts
+            }
+            scores = scoped or scores
+        return heapq.nlargest(n, scores.items(), key=lambda item: item[1])
+
+    def lookup_citations(self, query_text: str, limit: int, acts: list[str] | None = None) -> list[str]:
+        """
+        Chunk ids containing the sections or orders cited in the query. When
+        `acts` are given, or the query names an act, only those acts'
+        provisions are returned, unless none of them has the citation.
+        """
+        citations = query_citations(query_text)
+        if not citations:
+            return []
+        self._ensure_built()
+
+        acts = acts or acts_in_query(query_text)
+        ids = self._cited_ids(citations, acts) if acts else []
+        if not ids:
+            ids = self._cited_ids(citations, [None])
+        return list(dict.fromkeys(ids))[:limit]
+
+    def _cited_ids(self, citations: list[str], acts: list[str | None]) -> list[str]:
+        return [
+            chunk_id
+            for citation in citations
+            for act in acts
+            for chunk_id in self._citations.get((act, citation), [])
+        ]
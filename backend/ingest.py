@@ -0,0 +1,265 @@
+"""
+Incremental, parallel ingestion of the statute PDFs into Chroma.
+
+Each PDF is hashed first; only new or changed files are parsed (in a process
+pool) and chunked. Every chunk is identified by `source:page:index` as before,
+but the manifest also records a hash of each chunk's text, so an amended act
+whose page layout is unchanged is still re-embedded. Chunks that no longer
+exist, including those of deleted files, are removed from the store.
+
+Chunks are tagged with their act, year, section and chapter (`tag_chunks`)
+so searches can be scoped to one act.
+
+The lexical (BM25 and citation) index in hybrid_index.py is updated in the
+same pass.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from hybrid_index import CHAPTER_HEADING, SECTION_HEADING, LexicalIndex
+from statutes import ACTS, act_for_source
+from vector import (
+    CHROMA_PATH,
+    bump_corpus_version,
+    calculate_chunk_ids,
+    collection_name,
+    get_vector_store,
+    spilt_documents,
+)
+
+PDF_DIRECTORY = "PDFS"
+# One manifest per collection, since each embedding backend is ingested separately.
+MANIFEST_PATH = os.path.join(CHROMA_PATH, f"ingest_manifest.{collection_name()}.json")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+# Bump when tag_chunks changes: files ingested with an older version are
+# re-parsed and their chunks' metadata rewritten, without re-embedding.
+METADATA_VERSION = 1
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest: dict):
+    os.makedirs(CHROMA_PATH, exist_ok=True)
+    temp_path = f"{MANIFEST_PATH}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, MANIFEST_PATH)
+
+
+def tag_chunks(chunks):
+    """
+    Adds the act, its year, and the section and chapter to each chunk's
+    metadata, for act-scoped search. A chunk that does not open with a
+    heading belongs to the section and chapter in force where it starts,
+    carried over from the chunks before it. Chroma rejects None values, so
+    unknown fields are left out.
+    """
+    section = chapter = None
+    for chunk in chunks:
+        text = chunk.page_content
+        file_name = act_for_source(chunk.metadata.get("source"))
+        if file_name:
+            chunk.metadata["act"] = file_name
+            chunk.metadata["act_name"] = ACTS[file_name]["name"]
+            chunk.metadata["year"] = ACTS[file_name]["year"]
+
+        sections = SECTION_HEADING.findall(text)
+        chapters = CHAPTER_HEADING.findall(text)
+        opening_section = sections[0] if sections and SECTION_HEADING.match(text) else None
+        opening_chapter = chapters[0] if chapters and CHAPTER_HEADING.match(text) else None
+        for key, value in (
+            ("section", opening_section or section or (sections[0] if sections else None)),
+            ("chapter", opening_chapter or chapter or (chapters[0] if chapters else None)),
+        ):
+            if value:
+                chunk.metadata[key] = value.upper()
+
+        section = sections[-1] if sections else section
+        chapter = chapters[-1] if chapters else chapter
+    return chunks
+
+
+def parse_pdf(path: str):
+    """Runs in a worker process: parses one PDF and returns its tagged chunks with ids."""
+    pages = PyPDFLoader(path).load()
+    chunks = tag_chunks(calculate_chunk_ids(spilt_documents(pages)))
+    return path, len(pages), chunks
+
+
+def stored_hashes(vector_store, ids: list[str]) -> dict:
+    """Text hashes of chunks already in the store, for ids the manifest does not know about."""
+    hashes = {}
+    for start in range(0, len(ids), INGEST_BATCH_SIZE):
+        batch = ids[start : start + INGEST_BATCH_SIZE]
+        items = vector_store.get(ids=batch, include=["documents"])
+        for chunk_id, document in zip(items["ids"], items["documents"]):
+            hashes[chunk_id] = text_hash(document)
+    return hashes
+
+
+def upsert_in_batches(vector_store, chunks):
+    for start in range(0, len(chunks), INGEST_BATCH_SIZE):
+        batch = chunks[start : start + INGEST_BATCH_SIZE]
+        vector_store.add_documents(batch, ids=[chunk.metadata["id"] for chunk in batch])
+
+
+def update_metadata(vector_store, chunks):
+    """Rewrites the stored metadata of chunks whose text, and so vector, is unchanged."""
+    for start in range(0, len(chunks), INGEST_BATCH_SIZE):
+        batch = chunks[start : start + INGEST_BATCH_SIZE]
+        vector_store._collection.update(
+            ids=[chunk.metadata["id"] for chunk in batch],
+            metadatas=[chunk.metadata for chunk in batch],
+        )
+
+
+def ingest_directory(directory: str = PDF_DIRECTORY, vector_store=None) -> dict:
+    start = time.perf_counter()
+    if vector_store is None:
+        vector_store = get_vector_store()
+
+    manifest = load_manifest()
+    lexical_index = LexicalIndex.load()
+    paths = sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(".pdf")
+    )
+
+    # A file is also re-parsed when the lexical index is missing any of its
+    # chunks (e.g. the index was deleted) or its chunks were tagged by an older
+    # tag_chunks; its unchanged chunks are not re-embedded.
+    changed = {}
+    for path in paths:
+        digest = file_hash(path)
+        entry = manifest.get(path, {})
+        if (
+            entry.get("sha256") != digest
+            or not lexical_index.has_all(entry.get("chunks", {}))
+            or entry.get("metadata_version") != METADATA_VERSION
+        ):
+            changed[path] = digest
+
+    stats = {
+        "files": len(paths),
+        "files_parsed": 0,
+        "pages": 0,
+        "chunks": 0,
+        "chunks_embedded": 0,
+        "chunks_deleted": 0,
+        "chunks_retagged": 0,
+    }
+
+    for path in set(manifest) - set(paths):
+        stale_ids = list(manifest.pop(path)["chunks"])
+        if stale_ids:
+            vector_store.delete(ids=stale_ids)
+        lexical_index.remove(stale_ids)
+        stats["chunks_deleted"] += len(stale_ids)
+        print(f"Removed {len(stale_ids)} chunks of deleted file {path}")
+
+    print(f"{len(changed)} of {len(paths)} PDFs are new or changed.")
+
+    if changed:
+        context = multiprocessing.get_context("spawn")
+        workers = max(1, min(INGEST_WORKERS, len(changed)))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(parse_pdf, path) for path in changed]
+            for future in as_completed(futures):
+                path, page_count, chunks = future.result()
+                entry = manifest.get(path, {})
+                previous = entry.get("chunks", {})
+                new_hashes = {
+                    chunk.metadata["id"]: text_hash(chunk.page_content) for chunk in chunks
+                }
+
+                unknown = [chunk_id for chunk_id in new_hashes if chunk_id not in previous]
+                known = {**previous, **stored_hashes(vector_store, unknown)}
+
+                to_embed = [
+                    chunk
+                    for chunk in chunks
+                    if known.get(chunk.metadata["id"]) != new_hashes[chunk.metadata["id"]]
+                ]
+                stale_ids = [chunk_id for chunk_id in previous if chunk_id not in new_hashes]
+
+                upsert_in_batches(vector_store, to_embed)
+                retagged = []
+                # A file without a manifest entry was ingested before chunks
+                # were tagged (or with the manifest lost): retag it too.
+                if entry.get("metadata_version") != METADATA_VERSION:
+                    embedded_ids = {chunk.metadata["id"] for chunk in to_embed}
+                    retagged = [chunk for chunk in chunks if chunk.metadata["id"] not in embedded_ids]
+                    update_metadata(vector_store, retagged)
+                if stale_ids:
+                    vector_store.delete(ids=stale_ids)
+
+                lexical_index.remove(previous)
+                for chunk in chunks:
+                    lexical_index.add(
+                        chunk.metadata["id"], chunk.page_content, chunk.metadata.get("source")
+                    )
+
+                manifest[path] = {
+                    "sha256": changed[path],
+                    "metadata_version": METADATA_VERSION,
+                    "chunks": new_hashes,
+                }
+                save_manifest(manifest)
+
+                stats["files_parsed"] += 1
+                stats["pages"] += page_count
+                stats["chunks"] += len(chunks)
+                stats["chunks_embedded"] += len(to_embed)
+                stats["chunks_deleted"] += len(stale_ids)
+                stats["chunks_retagged"] += len(retagged)
+                print(
+                    f"{path}: {page_count} pages, {len(chunks)} chunks, "
+                    f"{len(to_embed)} embedded, {len(retagged)} retagged, {len(stale_ids)} deleted"
+                )
+
+    save_manifest(manifest)
+    lexical_index.save()
+    # Retagged chunks change what act-scoped searches find, so they count too.
+    if stats["chunks_embedded"] or stats["chunks_deleted"] or stats["chunks_retagged"]:
+        bump_corpus_version()
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 2)
+    stats["docs_per_sec"] = round(stats["pages"] / elapsed, 2) if elapsed else 0.0
+    stats["chunks_per_sec"] = round(stats["chunks_embedded"] / elapsed, 2) if elapsed else 0.0
+    print(
+        f"Ingested {stats['pages']} pages ({stats['docs_per_sec']} docs/sec), "
+        f"embedded {stats['chunks_embedded']} chunks ({stats['chunks_per_sec']} chunks/sec) "
+        f"in {elapsed:.1f}s"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    print(ingest_directory())
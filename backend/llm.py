@@ -1,32 +1,72 @@
 import asyncio
+import functools
+import threading
+import time
 from langchain.prompts import ChatPromptTemplate
-from langchain_chroma import Chroma
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain.schema.document import Document
+import numpy as np
 from dotenv import load_dotenv
 import os
 
-from vector import (
-    add_to_chroma,
-    clear_database,
-    get_embedding_function,
-    load_documents,
-    spilt_documents,
+import startup
+from vector import EMBEDDING_BACKEND, act_filter, clear_database, corpus_version
+from multilingual import (
+    LANGUAGES,
+    generate_audio_output,
+    split_sentences,
+    stream_tts,
+    synthesize_answer,
+    translater,
 )
-from multilingual import generate_audio_output
+from audio_cache import audio_cache
+from audio_jobs import AUDIO_MODE, audio_jobs
+from executors import run_blocking
+from semantic_cache import ANSWER_CACHE_ENABLED, answer_cache, answer_scope
+from hybrid_index import LexicalIndex, query_citations, reciprocal_rank_fusion
+from statutes import acts_in_query
+from context_builder import CONTEXT_TOKEN_BUDGET, build_context, context_stats, estimate_tokens
+from metrics import registry
+from tracing import add_totals, log_prompt, record, span
+from llm_gateway import chat_gateway
+from single_flight import SINGLE_FLIGHT_ENABLED, normalize_query, request_key, single_flight
 
 load_dotenv()
 
-vector_store = Chroma(
-    persist_directory="chroma_langchain_db",
-    embedding_function=get_embedding_function(),
-)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+LEXICAL_CANDIDATES = int(os.getenv("LEXICAL_CANDIDATES", "20"))
+CITATION_MAX_CHUNKS = int(os.getenv("CITATION_MAX_CHUNKS", "8"))
+# When a request does not scope itself to acts, search only the acts its
+# query names ("under the Consumer Protection Act"), if any.
+INFER_ACT_FILTER = os.getenv("INFER_ACT_FILTER", "true").lower() == "true"
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+# "direct" asks Gemini to answer non-English requests in the target language
+# in the same call; "translate" generates in English and translates after,
+# which costs a second round trip per answer.
+GENERATION_MODE = os.getenv("GENERATION_MODE", "direct")
 
+prompt_tokens_total = registry.counter(
+    "pravaah_llm_prompt_tokens_estimated_total", "Estimated prompt tokens sent to Gemini."
+)
+input_tokens_total = registry.counter(
+    "pravaah_llm_input_tokens_total", "Input tokens billed by Gemini."
+)
+output_tokens_total = registry.counter(
+    "pravaah_llm_output_tokens_total", "Output tokens billed by Gemini."
+)
+prompt_tokens_per_call = registry.histogram(
+    "pravaah_llm_prompt_tokens_estimated",
+    "Estimated prompt tokens of each call to Gemini.",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+)
+unscoped_fallbacks_total = registry.counter(
+    "pravaah_retrieval_unscoped_fallbacks_total",
+    "Act-scoped searches that found nothing and were retried across every act.",
+    ["pipeline"],
+)
 
-async def human_summarizer(query_text: str, lang: str):
 
-    PROMPT_TEMPLATE = """
+HUMAN_SUMMARIZER_PROMPT = """
     You are an AI assistant that explains legal topics in simple, everyday language. Your task is to answer the user's question clearly, based only on the text provided.
 
     CONTEXT:
@@ -43,30 +83,8 @@ async def human_summarizer(query_text: str, lang: str):
 
     """
 
-    results = vector_store.similarity_search_with_score(query=query_text, k=7)
-
-    context_text = "\n\n---\n\n".join([doc.page_content for doc, _score in results])
-    prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
-    prompt = prompt_template.format(context=context_text, question=query_text)
-
-    print("=" * 55)
-    print(prompt)
-    print("=" * 55)
-
-    response = model.invoke(prompt)
-
-    print("=" * 55)
-    print(response.content)
-    print("=" * 55)
 
-    restext, audio_path = await generate_audio_output(response.content, lang)
-
-    return restext, audio_path
-
-
-async def professional_summarizer(query_text: str, lang: str):
-
-    PROMPT_TEMPLATE = """
+PROFESSIONAL_SUMMARIZER_PROMPT = """
         ## ROLE & GOAL ##
         You are an AI Legal Analyst. Your goal is to provide a concise and technically accurate summary of the legal principles contained within the provided CONTEXT for a professional legal audience.
 
@@ -89,30 +107,8 @@ async def professional_summarizer(query_text: str, lang: str):
         "**Disclaimer:** This AI-generated summary is for informational and preliminary review purposes only and is not a substitute for a complete reading of the source text or independent legal analysis."
         """
 
-    results = vector_store.similarity_search_with_score(query=query_text, k=7)
-
-    context_text = "\n\n---\n\n".join([doc.page_content for doc, _score in results])
-    prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
-    prompt = prompt_template.format(context=context_text, question=query_text)
-
-    print("=" * 55)
-    print(prompt)
-    print("=" * 55)
-
-    response = model.invoke(prompt)
-
-    print("=" * 55)
-    print(response.content)
-    print("=" * 55)
-
-    restext, audio_path = await generate_audio_output(response.content, lang)
-
-    return restext, audio_path
-
 
-async def human_advisor(query_text: str, lang: str):
-
-    PROMPT_TEMPLATE = """
+HUMAN_ADVISOR_PROMPT = """
         ## ROLE & GOAL ##
         You are an AI Legal Advisor. Your goal is to analyze the user's situation based *exclusively* on the provided legal CONTEXT. You must break down the legal rules and apply them to the user's question in a clear, step-by-step manner using simple language.
 
@@ -139,38 +135,8 @@ async def human_advisor(query_text: str, lang: str):
         "**Disclaimer:** I am an AI assistant, not a lawyer. This analysis is for informational purposes only, based on the text provided, and is not a substitute for professional legal advice. You should consult with a qualified legal professional for your specific situation."
     """
 
-    retriever = vector_store.as_retriever(
-        search_type="mmr",
-        search_kwargs={
-            "k": 5,
-            "fetch_k": 20,
-        },
-    )
-
-    results = retriever.get_relevant_documents(query_text)
-
-    context_text = "\n\n---\n\n".join([doc.page_content for doc in results])
-    prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
-    prompt = prompt_template.format(context=context_text, question=query_text)
-
-    print("=" * 55)
-    print(prompt)
-    print("=" * 55)
-
-    response = model.invoke(prompt)
-
-    print("=" * 55)
-    print(response.content)
-    print("=" * 55)
-
-    restext, audio_path = await generate_audio_output(response.content, lang)
-
-    return restext, audio_path
-
-
-async def professional_advisor(query_text: str, lang: str):
 
-    PROMPT_TEMPLATE = """
+PROFESSIONAL_ADVISOR_PROMPT = """
         ## ROLE & GOAL ##
         You are a Specialist AI Legal Analyst. Your function is to provide a detailed and technical legal analysis for a legal professional. Your goal is to dissect the user's query, apply the relevant statutory provisions from the provided CONTEXT, and outline the legal reasoning, potential arguments, and conclusions.
 
@@ -198,40 +164,479 @@ async def professional_advisor(query_text: str, lang: str):
         "**Disclaimer:** This AI-generated analysis is for informational and preliminary review purposes only. It is not a substitute for independent professional legal judgment and should not be cited as legal authority. Always conduct your own comprehensive research."
         """
 
-    retriever = vector_store.as_retriever(
-        search_type="mmr",
-        search_kwargs={
-            "k": 5,
-            "fetch_k": 20,
-        },
+
+LANGUAGE_INSTRUCTION = """
+    LANGUAGE:
+    Write your entire response in {language}, including the disclaimer. Keep section numbers, act names and other legal citations exactly as they appear in the CONTEXT.
+    """
+
+
+async def embed_query(query_text: str):
+    query_embedder = await startup.aget("query_embedder")
+    with span("embedding"):
+        return await query_embedder.embed_query(query_text)
+
+
+def search_acts(query_text: str, acts: list[str] | None = None) -> list[str] | None:
+    """The ACTS keys a query's search is restricted to, or None to search every act."""
+    if acts:
+        return acts
+    if INFER_ACT_FILTER:
+        return acts_in_query(query_text) or None
+    return None
+
+
+async def similarity_context(embedding, k: int, acts: list[str] | None = None):
+    vector_store = await startup.aget("vector_store")
+    with span("chroma_search", method="similarity", k=k, scoped=bool(acts)):
+        results = await run_blocking(
+            vector_store.similarity_search_by_vector_with_relevance_scores,
+            embedding=embedding,
+            k=k,
+            filter=act_filter(acts),
+        )
+    return [doc for doc, _score in results]
+
+
+async def mmr_context(embedding, k: int, fetch_k: int, acts: list[str] | None = None):
+    vector_store = await startup.aget("vector_store")
+    with span("chroma_search", method="mmr", k=k, fetch_k=fetch_k, scoped=bool(acts)):
+        return await run_blocking(
+            vector_store.max_marginal_relevance_search_by_vector,
+            embedding=embedding,
+            k=k,
+            fetch_k=fetch_k,
+            filter=act_filter(acts),
+        )
+
+
+async def embed_queries(texts: list[str]) -> list[list[float]]:
+    """Embeds many queries in a single forward pass, bypassing the batching queue."""
+    if not texts:
+        return []
+    query_embedder = await startup.aget("query_embedder")
+    with span("embedding", texts=len(texts)):
+        return await run_blocking(query_embedder.embeddings.embed_documents, texts)
+
+
+async def dense_search_many(pipeline: str, embeddings: list[list[float]], acts: list[str] | None = None):
+    """
+    Runs the pipeline's dense search for many query vectors in one Chroma
+    query rather than one per vector, returning the documents for each in
+    the same order. MMR re-ranks each query's fetch_k candidates exactly as
+    `max_marginal_relevance_search_by_vector` does.
+    """
+    if not embeddings:
+        return []
+    vector_store = await startup.aget("vector_store")
+    collection = getattr(vector_store, "_collection", None)
+    if collection is None:
+        return await asyncio.gather(*(dense_search(pipeline, embedding, acts) for embedding in embeddings))
+
+    settings = SEARCH_SETTINGS[pipeline]
+    mmr = settings["method"] == "mmr"
+    include = ["documents", "metadatas"] + (["embeddings"] if mmr else [])
+    with span(
+        "chroma_search",
+        method=f"{settings['method']}_batch",
+        k=settings["k"],
+        queries=len(embeddings),
+        scoped=bool(acts),
+    ):
+        results = await run_blocking(
+            collection.query,
+            query_embeddings=embeddings,
+            n_results=settings["fetch_k"] if mmr else settings["k"],
+            where=act_filter(acts),
+            include=include,
+        )
+
+    per_query = []
+    for index, embedding in enumerate(embeddings):
+        documents = [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(results["documents"][index], results["metadatas"][index])
+        ]
+        if mmr and documents:
+            from langchain_chroma.vectorstores import maximal_marginal_relevance
+
+            selected = maximal_marginal_relevance(
+                np.array(embedding, dtype=np.float32),
+                results["embeddings"][index],
+                k=settings["k"],
+                lambda_mult=0.5,
+            )
+            documents = [documents[i] for i in selected]
+        if acts and not documents:
+            record_unscoped_fallback(pipeline, acts)
+            documents = await dense_search(pipeline, embedding)
+        per_query.append(documents)
+    return per_query
+
+
+# How each pipeline retrieves context: the summarizers take the top-k most
+# similar chunks, the advisors use MMR to get a more diverse set of
+# provisions to reason over. The query is embedded once
+# up front so the same vector serves both the answer cache and the search.
+# k and fetch_k can be overridden per pipeline, e.g. HUMAN_ADVISOR_FETCH_K=40.
+DEFAULT_SEARCH_SETTINGS = {
+    "human_summarizer": {"method": "similarity", "k": 7},
+    "professional_summarizer": {"method": "similarity", "k": 7},
+    "human_advisor": {"method": "mmr", "k": 5, "fetch_k": 20},
+    "professional_advisor": {"method": "mmr", "k": 5, "fetch_k": 20},
+}
+SEARCH_SETTINGS = {
+    pipeline: {
+        key: value if key == "method" else int(os.getenv(f"{pipeline.upper()}_{key.upper()}", str(value)))
+        for key, value in settings.items()
+    }
+    for pipeline, settings in DEFAULT_SEARCH_SETTINGS.items()
+}
+
+
+async def dense_search(pipeline: str, embedding, acts: list[str] | None = None):
+    """
+    The pipeline's dense search, restricted to `acts` when given. A scoped
+    search that finds nothing, as on a store ingested before chunks were
+    tagged with their act, is retried across every act.
+    """
+    settings = SEARCH_SETTINGS[pipeline]
+    if settings["method"] == "mmr":
+        search = functools.partial(mmr_context, k=settings["k"], fetch_k=settings["fetch_k"])
+    else:
+        search = functools.partial(similarity_context, k=settings["k"])
+    documents = await search(embedding, acts=acts)
+    if acts and not documents:
+        record_unscoped_fallback(pipeline, acts)
+        documents = await search(embedding)
+    return documents
+
+
+def record_unscoped_fallback(pipeline: str, acts: list[str]):
+    # Frequent fallbacks mean the store's chunks are not tagged with their act.
+    unscoped_fallbacks_total.inc(pipeline=pipeline)
+    print(f"No chunks tagged with {acts} for {pipeline}; searching every act. Is the store re-ingested?")
+
+
+# The prompt each pipeline answers with; SEARCH_SETTINGS says how it retrieves.
+PIPELINES = {
+    "human_summarizer": HUMAN_SUMMARIZER_PROMPT,
+    "professional_summarizer": PROFESSIONAL_SUMMARIZER_PROMPT,
+    "human_advisor": HUMAN_ADVISOR_PROMPT,
+    "professional_advisor": PROFESSIONAL_ADVISOR_PROMPT,
+}
+
+# "dense" searches Chroma only. "hybrid" answers statute citations ("Section
+# 302 IPC") from the exact citation index without embedding the query, and
+# otherwise fuses the dense results with BM25 using reciprocal rank fusion.
+# Professionals query by citation far more often, so they default to hybrid.
+RETRIEVAL_MODES = {
+    pipeline: os.getenv(
+        f"{pipeline.upper()}_RETRIEVAL",
+        "hybrid" if pipeline.startswith("professional") else "dense",
     )
+    for pipeline in PIPELINES
+}
+
+
+async def documents_by_id(chunk_ids: list[str]):
+    vector_store = await startup.aget("vector_store")
+    with span("chroma_get", ids=len(chunk_ids)):
+        items = await run_blocking(
+            vector_store.get, ids=chunk_ids, include=["documents", "metadatas"]
+        )
+    found = {
+        chunk_id: Document(page_content=text, metadata=metadata or {})
+        for chunk_id, text, metadata in zip(
+            items["ids"], items["documents"], items["metadatas"]
+        )
+    }
+    return [found[chunk_id] for chunk_id in chunk_ids if chunk_id in found]
+
+
+_lexical_reload_lock = threading.Lock()
+
+
+def _reload_lexical_index(stale: LexicalIndex) -> LexicalIndex:
+    # Concurrent requests that all saw the stale index load it only once.
+    with _lexical_reload_lock:
+        current = startup.get("lexical_index")
+        if current is stale:
+            current = LexicalIndex.load()
+            startup.override("lexical_index", current)
+            print(f"Reloaded the lexical index at corpus version {current.corpus_version}")
+        return current
+
+
+async def current_lexical_index() -> LexicalIndex:
+    """
+    The lexical index, reloaded from disk once an ingest has changed the
+    corpus, so BM25 and citation lookups see new acts without a restart.
+    """
+    lexical_index = await startup.aget("lexical_index")
+    if await run_blocking(corpus_version) != lexical_index.corpus_version:
+        lexical_index = await run_blocking(_reload_lexical_index, lexical_index)
+    return lexical_index
+
+
+async def citation_context(query_text: str, acts: list[str] | None = None):
+    lexical_index = await current_lexical_index()
+    with span("citation_lookup"):
+        chunk_ids = await run_blocking(
+            lexical_index.lookup_citations, query_text, CITATION_MAX_CHUNKS, acts
+        )
+    return await documents_by_id(chunk_ids) if chunk_ids else []
+
+
+async def fuse_lexical(query_text: str, documents, acts: list[str] | None = None):
+    lexical_index = await current_lexical_index()
+    with span("bm25_search"):
+        lexical = await run_blocking(lexical_index.search, query_text, LEXICAL_CANDIDATES, acts)
+
+    dense_ids = [doc.metadata.get("id") for doc in documents]
+    fused_ids = reciprocal_rank_fusion(dense_ids, [chunk_id for chunk_id, _score in lexical])
+    fused_ids = fused_ids[: len(documents)]
+
+    by_id = {doc.metadata.get("id"): doc for doc in documents}
+    missing = [chunk_id for chunk_id in fused_ids if chunk_id not in by_id]
+    if missing:
+        for doc in await documents_by_id(missing):
+            by_id[doc.metadata.get("id")] = doc
+    return [by_id[chunk_id] for chunk_id in fused_ids if chunk_id in by_id]
+
 
-    results = retriever.get_relevant_documents(query_text)
+def skips_embedding(pipeline: str, query_text: str) -> bool:
+    return RETRIEVAL_MODES[pipeline] == "hybrid" and bool(query_citations(query_text))
 
-    context_text = "\n\n---\n\n".join([doc.page_content for doc in results])
-    prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
+
+async def retrieve_context(
+    pipeline: str, query_text: str, embedding=None, dense_documents=None, acts: list[str] | None = None
+):
+    """
+    The context chunks for a query, from `acts` only when given.
+    `dense_documents`, when given, are the query's dense search results
+    already fetched in a batch.
+    """
+    hybrid = RETRIEVAL_MODES[pipeline] == "hybrid"
+
+    if hybrid and query_citations(query_text):
+        documents = await citation_context(query_text, acts)
+        if documents:
+            print(f"Answered retrieval from the citation index ({len(documents)} chunks)")
+            return documents
+
+    documents = dense_documents
+    if documents is None:
+        if embedding is None:
+            embedding = await embed_query(query_text)
+        documents = await dense_search(pipeline, embedding, acts)
+    if hybrid:
+        documents = await fuse_lexical(query_text, documents, acts)
+    return documents
+
+
+def generates_in_language(lang: str) -> bool:
+    """Whether the answer for `lang` is generated directly, with no translation step."""
+    return GENERATION_MODE == "direct" and lang != "eng" and lang in LANGUAGES
+
+
+def build_prompt(
+    template: str,
+    documents,
+    query_text: str,
+    budget_tokens: int = CONTEXT_TOKEN_BUDGET,
+    lang: str = "eng",
+) -> tuple[str, list[dict]]:
+    """Returns the prompt and the sources its CONTEXT cites."""
+    context_text, sources = build_context(documents, budget_tokens)
+    prompt_template = ChatPromptTemplate.from_template(template)
     prompt = prompt_template.format(context=context_text, question=query_text)
+    if generates_in_language(lang):
+        prompt += LANGUAGE_INSTRUCTION.format(language=LANGUAGES[lang][0])
+    return prompt, sources
+
+
+def record_prompt_tokens(prompt: str, response=None):
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = estimate_tokens(prompt)
+    context_stats.record_prompt(prompt_tokens, usage.get("input_tokens"))
+    prompt_tokens_total.inc(prompt_tokens)
+    prompt_tokens_per_call.observe(prompt_tokens)
+    input_tokens_total.inc(usage.get("input_tokens") or 0)
+    output_tokens_total.inc(usage.get("output_tokens") or 0)
+    add_totals(
+        prompt_tokens_estimated=prompt_tokens,
+        input_tokens=usage.get("input_tokens"),
+        output_tokens=usage.get("output_tokens"),
+    )
+
+
+async def cached_answer(scope: str, embedding):
+    answer_cache.check_corpus(await run_blocking(corpus_version))
+    return answer_cache.lookup(scope, embedding)
 
-    print("=" * 55)
-    print(prompt)
-    print("=" * 55)
 
-    response = model.invoke(prompt)
+async def deliver_audio(text: str, lang: str, audio: bool = True):
+    """
+    Returns the audio URL for an answer already in its final language, and
+    the id of the job producing it when AUDIO_MODE is "background". A clip
+    the audio cache has evicted is simply synthesized again.
+    """
+    if not audio:
+        return None, None
+    voice_model = LANGUAGES[lang][1]
+    if AUDIO_MODE == "background":
+        job_id = audio_jobs.submit(text, voice_model)
+        return audio_cache.url_for(job_id), job_id
+    return await synthesize_answer(text, voice_model), None
+
+
+async def finish_answer(content: str, lang: str, audio: bool = True):
+    """Turns generated text into `(text, audio_path, audio_job)` in the requested language."""
+    if lang == "eng" or generates_in_language(lang):
+        restext = content
+    elif audio and AUDIO_MODE == "inline":
+        # Overlaps translation with synthesis, segment by segment.
+        restext, audio_path = await generate_audio_output(content, lang)
+        return restext, audio_path, None
+    else:
+        restext, _voice_model = await translater(lang=lang, script=content)
+
+    audio_path, audio_job = await deliver_audio(restext, lang, audio)
+    return restext, audio_path, audio_job
+
+
+async def run_pipeline(
+    pipeline: str,
+    query_text: str,
+    lang: str,
+    audio: bool = True,
+    acts: list[str] | None = None,
+    embedding=None,
+    dense_documents=None,
+):
+    """
+    Answers a query, returning `(text, audio_path, audio_job)`, from `acts`
+    only when given. Identical concurrent requests share a single execution.
+    Batches pass the query's `embedding` and `dense_documents` when they
+    have already fetched them.
+    """
+    run = lambda: _run_pipeline(pipeline, query_text, lang, audio, acts, embedding, dense_documents)
+    if not SINGLE_FLIGHT_ENABLED:
+        return await run()
+    key = request_key("query", pipeline, lang, audio, acts, normalize_query(query_text))
+    return await single_flight.run(key, run)
+
+
+async def _run_pipeline(
+    pipeline: str,
+    query_text: str,
+    lang: str,
+    audio: bool,
+    acts: list[str] | None = None,
+    embedding=None,
+    dense_documents=None,
+):
+    template = PIPELINES[pipeline]
+    acts = search_acts(query_text, acts)
+
+    # Citation lookups skip the embedding forward pass, and with it the
+    # answer cache, which is keyed on the embedding.
+    if embedding is None and not skips_embedding(pipeline, query_text):
+        embedding = await embed_query(query_text)
+
+    scope = answer_scope(EMBEDDING_BACKEND, pipeline, lang, acts, query_citations(query_text))
+    if ANSWER_CACHE_ENABLED and embedding is not None:
+        cached = await cached_answer(scope, embedding)
+        if cached:
+            print(f"Answer served from cache for scope {scope}")
+            audio_path, audio_job = await deliver_audio(cached["text"], lang, audio)
+            return cached["text"], audio_path, audio_job
+
+    documents = await retrieve_context(pipeline, query_text, embedding, dense_documents, acts)
+    prompt, _sources = build_prompt(template, documents, query_text, lang=lang)
+
+    log_prompt("Prompt", prompt)
+
+    with span("llm", pipeline=pipeline):
+        response = await chat_gateway.ainvoke(prompt)
+    record_prompt_tokens(prompt, response)
+
+    log_prompt("Response", response.content)
+
+    restext, audio_path, audio_job = await finish_answer(response.content, lang, audio)
+
+    if ANSWER_CACHE_ENABLED and embedding is not None:
+        answer_cache.store(scope, embedding, restext)
+        if answer_cache.save_due():
+            # Off the retrieval pool, which embedding and search need.
+            await asyncio.to_thread(answer_cache.save, answer_cache.snapshot())
+
+    return restext, audio_path, audio_job
+
+
+async def stream_pipeline(
+    pipeline: str, query_text: str, lang: str, audio: bool = True, acts: list[str] | None = None
+):
+    """
+    Runs a pipeline incrementally, yielding `(event, data)` pairs as each
+    stage produces output: the retrieved sources, then the answer tokens as
+    Gemini generates them, the translated text (for non-English requests
+    in "translate" mode), and finally the audio as MP3 chunks synthesized sentence by sentence.
+    """
+    template = PIPELINES[pipeline]
+    documents = await retrieve_context(pipeline, query_text, acts=search_acts(query_text, acts))
+    prompt, sources = build_prompt(template, documents, query_text, lang=lang)
+    yield "sources", sources
 
-    print("=" * 55)
-    print(response.content)
-    print("=" * 55)
+    record_prompt_tokens(prompt)
+    answer = ""
+    # Spans cannot stay open across yields, so the stream is timed by hand.
+    start = time.perf_counter()
+    async for chunk in chat_gateway.astream(prompt):
+        if chunk.content:
+            if not answer:
+                record("llm_first_token", time.perf_counter() - start, pipeline=pipeline)
+            answer += chunk.content
+            yield "token", chunk.content
+    record("llm_stream", time.perf_counter() - start, pipeline=pipeline)
 
-    restext, audio_path = await generate_audio_output(response.content, lang)
+    if generates_in_language(lang):
+        restext, voice_model = answer, LANGUAGES[lang][1]
+    else:
+        restext, voice_model = await translater(lang=lang, script=answer)
+        if lang != "eng":
+            yield "translation", restext
 
-    return restext, audio_path
+    if audio:
+        for sentence in split_sentences(restext):
+            async for chunk in stream_tts(sentence, voice_model):
+                yield "audio", chunk
+
+    yield "done", {"text": restext}
+
+
+async def human_summarizer(query_text: str, lang: str, audio: bool = True, acts: list[str] | None = None):
+    return await run_pipeline("human_summarizer", query_text, lang, audio, acts)
+
+
+async def professional_summarizer(query_text: str, lang: str, audio: bool = True, acts: list[str] | None = None):
+    return await run_pipeline("professional_summarizer", query_text, lang, audio, acts)
+
+
+async def human_advisor(query_text: str, lang: str, audio: bool = True, acts: list[str] | None = None):
+    return await run_pipeline("human_advisor", query_text, lang, audio, acts)
+
+
+async def professional_advisor(query_text: str, lang: str, audio: bool = True, acts: list[str] | None = None):
+    return await run_pipeline("professional_advisor", query_text, lang, audio, acts)
 
 
 def load_vector_store():
-    documents = load_documents()
-    chunks = spilt_documents(documents)
-    add_to_chroma(chunks)
-    return {"message": "Done"}
+    from ingest import ingest_directory
+
+    stats = ingest_directory(vector_store=startup.vector_store())
+    return {"message": "Done", **stats}
 
 
 def delete_vector_store():
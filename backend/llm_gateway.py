@@ -0,0 +1,365 @@
+"""
+The single path from the pipelines to Gemini.
+
+Every chat and translation call goes through an `LLMGateway`, which wraps
+the shared client created once per process by startup.py and adds what the
+client lacks:
+
+- a token bucket on requests and prompt tokens per minute, sized to the
+  project's quota, so bursts queue here instead of coming back as 429s;
+- a cap on calls in flight;
+- retries of rate-limit, overload and timeout errors with jittered
+  exponential backoff, all within a per-call deadline;
+- optionally, a hedged duplicate of a call that is slower than
+  LLM_HEDGE_AFTER_SECONDS, when the bucket has room for it; the first
+  response wins and the other is cancelled.
+
+When retries or the deadline run out, `LLMUnavailableError` is raised and the
+routers answer 503 rather than 500. The gateway only needs the wrapped
+resource to have `ainvoke` and `astream`, so the benchmarks' FakeChatModel can
+stand in for Gemini.
+"""
+import asyncio
+import os
+import random
+import time
+
+import startup
+from metrics import registry
+
+# Quota of the Gemini project, per model. 0 disables the limit.
+CHAT_REQUESTS_PER_MINUTE = float(os.getenv("CHAT_REQUESTS_PER_MINUTE", "1000"))
+CHAT_TOKENS_PER_MINUTE = float(os.getenv("CHAT_TOKENS_PER_MINUTE", "1000000"))
+TRANSLATION_REQUESTS_PER_MINUTE = float(os.getenv("TRANSLATION_REQUESTS_PER_MINUTE", "1000"))
+TRANSLATION_TOKENS_PER_MINUTE = float(os.getenv("TRANSLATION_TOKENS_PER_MINUTE", "1000000"))
+# How many seconds of quota may be spent at once after an idle spell.
+LLM_BURST_SECONDS = float(os.getenv("LLM_BURST_SECONDS", "5"))
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "8"))
+# Each attempt may take LLM_TIMEOUT_SECONDS; a call including retries and
+# queueing may take LLM_DEADLINE_SECONDS.
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "90"))
+# 0 disables hedging.
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+
+CHARS_PER_TOKEN = 4
+
+# Exception names (checked along the __cause__ chain) worth retrying.
+RETRYABLE_ERRORS = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "TimeoutError",
+    "ConnectionError",
+}
+
+queue_seconds = registry.histogram(
+    "pravaah_llm_queue_seconds", "Time a call waited for quota and a free slot.", ["model"]
+)
+call_seconds = registry.histogram(
+    "pravaah_llm_call_seconds", "Time a single attempt spent in the model.", ["model", "outcome"]
+)
+retries_total = registry.counter(
+    "pravaah_llm_retries_total", "Attempts retried after a transient error.", ["model", "error"]
+)
+hedges_total = registry.counter(
+    "pravaah_llm_hedges_total", "Hedged duplicate requests, by which attempt won.", ["model", "winner"]
+)
+
+
+class LLMUnavailableError(Exception):
+    """Raised when Gemini stays rate limited or overloaded past the call's deadline."""
+
+
+class TokenBucket:
+    """Admits `rate` units per second on average, up to `capacity` at once."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, amount: float = 1) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+    async def acquire(self, amount: float = 1):
+        if self.rate <= 0:
+            return
+        # A single oversized prompt waits for a full bucket rather than forever.
+        amount = min(amount, self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # The lock makes waiters take turns, so a large request is not starved.
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+def is_retryable(error: BaseException) -> bool:
+    while error is not None:
+        if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+            return True
+        if type(error).__name__ in RETRYABLE_ERRORS or " 429 " in f" {error} ":
+            return True
+        error = error.__cause__
+    return False
+
+
+def estimate_prompt_tokens(prompt) -> int:
+    text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        resource: str,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        deadline: float = LLM_DEADLINE_SECONDS,
+        hedge_after: float = LLM_HEDGE_AFTER_SECONDS,
+    ):
+        self.resource = resource
+        self.requests = TokenBucket(
+            requests_per_minute / 60, requests_per_minute / 60 * LLM_BURST_SECONDS
+        )
+        self.tokens = TokenBucket(
+            tokens_per_minute / 60, tokens_per_minute / 60 * LLM_BURST_SECONDS
+        )
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self._slots = None
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedges = 0
+        self.queue_seconds = 0.0
+        self.model_seconds = 0.0
+
+    async def _model(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return await startup.aget(self.resource)
+
+    async def _admit(self, prompt_tokens: int, deadline: float, hedge: bool = False):
+        """
+        Waits for quota and a free slot, but not past the call's deadline.
+        Hedges take quota only if it is free right now.
+        """
+
+        async def wait():
+            if not hedge:
+                await self.requests.acquire(1)
+                await self.tokens.acquire(prompt_tokens)
+            await self._slots.acquire()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(wait(), timeout=self._remaining(deadline))
+        except asyncio.TimeoutError:
+            raise LLMUnavailableError(
+                f"{self.resource} had no free quota or slot within {self.deadline:.0f}s."
+            ) from None
+        finally:
+            waited = time.perf_counter() - start
+            self.queue_seconds += waited
+            queue_seconds.observe(waited, model=self.resource)
+
+    def _remaining(self, deadline: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMUnavailableError(f"{self.resource} did not answer within {self.deadline:.0f}s.")
+        return remaining
+
+    def _attempt_timeout(self, deadline: float) -> float:
+        return min(self.timeout, self._remaining(deadline))
+
+    async def _attempt(self, model, prompt, prompt_tokens: int, deadline: float, hedge: bool = False, **kwargs):
+        await self._admit(prompt_tokens, deadline, hedge)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await asyncio.wait_for(
+                model.ainvoke(prompt, **kwargs), timeout=self._attempt_timeout(deadline)
+            )
+            outcome = "ok"
+            return response
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            self._slots.release()
+            elapsed = time.perf_counter() - start
+            self.model_seconds += elapsed
+            call_seconds.observe(elapsed, model=self.resource, outcome=outcome)
+
+    async def _hedged(self, model, prompt, prompt_tokens: int, deadline: float, **kwargs):
+        primary = asyncio.ensure_future(self._attempt(model, prompt, prompt_tokens, deadline, **kwargs))
+        if not self.hedge_after:
+            return await primary
+
+        tasks = {primary}
+        hedged = False
+        try:
+            done, _pending = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done and self.requests.try_acquire(1) and self.tokens.try_acquire(prompt_tokens):
+                hedged = True
+                self.hedges += 1
+                tasks.add(
+                    asyncio.ensure_future(
+                        self._attempt(model, prompt, prompt_tokens, deadline, hedge=True, **kwargs)
+                    )
+                )
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if hedged:
+                            hedges_total.inc(
+                                model=self.resource, winner="primary" if task is primary else "hedge"
+                            )
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _backoff(self, error: Exception, attempt: int, deadline: float):
+        """Sleeps before the next attempt, or raises if the error is final."""
+        if not is_retryable(error):
+            self.failures += 1
+            raise error
+        delay = random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2**attempt))
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+            self.failures += 1
+            raise LLMUnavailableError(
+                f"{self.resource} is rate limited or unavailable: {error}"
+            ) from error
+        self.retries += 1
+        retries_total.inc(model=self.resource, error=type(error).__name__)
+        await asyncio.sleep(delay)
+
+    async def ainvoke(self, prompt, **kwargs):
+        model = await self._model()
+        self.calls += 1
+        deadline = time.monotonic() + self.deadline
+        prompt_tokens = estimate_prompt_tokens(prompt)
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(model, prompt, prompt_tokens, deadline, **kwargs)
+            except LLMUnavailableError:
+                self.failures += 1
+                raise
+            except Exception as e:
+                await self._backoff(e, attempt, deadline)
+                attempt += 1
+
+    async def astream(self, prompt, **kwargs):
+        """
+        Streams the response. Failures before the first chunk are retried
+        like `ainvoke`; once output has been yielded they are raised, since the
+        caller has already forwarded it. Streams are never hedged.
+        """
+        model = await self._model()
+        self.calls += 1
+        deadline = time.monotonic() + self.deadline
+        prompt_tokens = estimate_prompt_tokens(prompt)
+        attempt = 0
+        while True:
+            await self._admit(prompt_tokens, deadline)
+            start = time.perf_counter()
+            iterator = None
+            try:
+                iterator = aiter(model.astream(prompt, **kwargs))
+                first = await asyncio.wait_for(anext(iterator), timeout=self._attempt_timeout(deadline))
+            except StopAsyncIteration:
+                self._slots.release()
+                return
+            # BaseException too: a client that disconnects before the first
+            # chunk cancels the stream, and its slot must still be freed.
+            except BaseException as e:
+                self._slots.release()
+                if hasattr(iterator, "aclose"):
+                    await iterator.aclose()
+                cancelled = isinstance(e, asyncio.CancelledError)
+                call_seconds.observe(
+                    time.perf_counter() - start,
+                    model=self.resource,
+                    outcome="cancelled" if cancelled else "error",
+                )
+                if not isinstance(e, Exception):
+                    raise
+                if isinstance(e, LLMUnavailableError):
+                    self.failures += 1
+                    raise
+                await self._backoff(e, attempt, deadline)
+                attempt += 1
+                continue
+            break
+
+        outcome = "error"
+        try:
+            yield first
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(iterator), timeout=self.timeout)
+                except StopAsyncIteration:
+                    break
+                yield chunk
+            outcome = "ok"
+        finally:
+            self._slots.release()
+            elapsed = time.perf_counter() - start
+            self.model_seconds += elapsed
+            call_seconds.observe(elapsed, model=self.resource, outcome=outcome)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "hedges": self.hedges,
+            "in_flight": self.max_concurrency - self._slots._value if self._slots else 0,
+            "queue_seconds": round(self.queue_seconds, 3),
+            "model_seconds": round(self.model_seconds, 3),
+        }
+
+
+chat_gateway = LLMGateway("chat_model", CHAT_REQUESTS_PER_MINUTE, CHAT_TOKENS_PER_MINUTE)
+translation_gateway = LLMGateway(
+    "translation_model", TRANSLATION_REQUESTS_PER_MINUTE, TRANSLATION_TOKENS_PER_MINUTE
+)
@@ -0,0 +1,156 @@
+"""
+Map-reduce answering for long uploaded documents.
+
+Sending a 60-page contract as a single query gives a useless embedding (the
+model truncates it) and an enormous prompt. Instead the upload is split into
+parts, statute context is retrieved for each part, each part is summarized
+against its context concurrently (map), and the partial summaries are
+answered with the pipeline's own prompt (reduce). Every stage works within a
+token budget, so cost grows with document size only up to a fixed ceiling.
+"""
+import asyncio
+import os
+
+from langchain.prompts import ChatPromptTemplate
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from llm_gateway import chat_gateway
+from single_flight import SINGLE_FLIGHT_ENABLED, request_key, single_flight
+from tracing import span
+from context_builder import CHARS_PER_TOKEN, build_context, estimate_tokens
+from llm import (
+    PIPELINES,
+    build_prompt,
+    embed_query,
+    finish_answer,
+    record_prompt_tokens,
+    similarity_context,
+)
+
+# Documents longer than this many estimated tokens take the map-reduce path.
+LONG_DOCUMENT_TOKENS = int(os.getenv("LONG_DOCUMENT_TOKENS", "2000"))
+MAP_PART_TOKENS = int(os.getenv("MAP_PART_TOKENS", "1500"))
+MAP_MAX_PARTS = int(os.getenv("MAP_MAX_PARTS", "16"))
+MAP_CONTEXT_TOKENS = int(os.getenv("MAP_CONTEXT_TOKENS", "1200"))
+MAP_SUMMARY_WORDS = int(os.getenv("MAP_SUMMARY_WORDS", "200"))
+MAP_CONCURRENCY = int(os.getenv("MAP_CONCURRENCY", "4"))
+MAP_K_PER_PART = int(os.getenv("MAP_K_PER_PART", "3"))
+REDUCE_CONTEXT_TOKENS = int(os.getenv("REDUCE_CONTEXT_TOKENS", "3000"))
+
+MAP_PROMPT = """
+    You are reviewing part {part} of {parts} of a legal document uploaded by a user.
+
+    RELEVANT LAW:
+    {context}
+    ---
+    DOCUMENT PART:
+    {document}
+
+    INSTRUCTIONS:
+    1.  Summarize the legally significant content of this part in at most {max_words} words: parties, obligations, deadlines, allegations, amounts and any provisions of law it relies on.
+    2.  Where the RELEVANT LAW above bears on this part, name the provision and state how it applies.
+    3.  Do not add a disclaimer or an introduction.
+    """
+
+
+def is_long_document(text: str) -> bool:
+    return estimate_tokens(text) > LONG_DOCUMENT_TOKENS
+
+
+def split_parts(text: str) -> list[str]:
+    """
+    Splits the document into parts of about MAP_PART_TOKENS. Anything beyond
+    MAP_MAX_PARTS parts is dropped, which caps the number of map calls.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=MAP_PART_TOKENS * CHARS_PER_TOKEN,
+        chunk_overlap=100,
+        length_function=len,
+        is_separator_regex=False,
+    )
+    parts = splitter.split_text(text)
+    if len(parts) > MAP_MAX_PARTS:
+        print(f"Document has {len(parts)} parts; only the first {MAP_MAX_PARTS} are summarized.")
+    return parts[:MAP_MAX_PARTS]
+
+
+async def retrieve_per_part(parts: list[str]):
+    """
+    Retrieves statute chunks for every part, then deduplicates across parts:
+    a chunk is only given to the first part that retrieved it, so no statute
+    text is sent to the model twice during the map stage.
+    """
+    embeddings = await asyncio.gather(*(embed_query(part) for part in parts))
+    results = await asyncio.gather(
+        *(similarity_context(embedding, k=MAP_K_PER_PART) for embedding in embeddings)
+    )
+
+    seen = set()
+    per_part = []
+    for documents in results:
+        unique = []
+        for doc in documents:
+            chunk_id = doc.metadata.get("id") or doc.page_content
+            if chunk_id not in seen:
+                seen.add(chunk_id)
+                unique.append(doc)
+        per_part.append(unique)
+    return per_part
+
+
+async def summarize_parts(parts: list[str], contexts) -> list[str]:
+    prompt_template = ChatPromptTemplate.from_template(MAP_PROMPT)
+    semaphore = asyncio.Semaphore(MAP_CONCURRENCY)
+
+    async def summarize(index: int, part: str, documents) -> str:
+        prompt = prompt_template.format(
+            part=index + 1,
+            parts=len(parts),
+            context=build_context(documents, MAP_CONTEXT_TOKENS)[0],
+            document=part,
+            max_words=MAP_SUMMARY_WORDS,
+        )
+        async with semaphore:
+            with span("llm", pipeline="map", part=index + 1):
+                response = await chat_gateway.ainvoke(prompt)
+        record_prompt_tokens(prompt, response)
+        return response.content
+
+    return await asyncio.gather(
+        *(summarize(index, part, documents) for index, (part, documents) in enumerate(zip(parts, contexts)))
+    )
+
+
+async def run_long_document(pipeline: str, text: str, lang: str, audio: bool = True):
+    """
+    Answers an uploaded document with the given pipeline's prompt via
+    map-reduce. The same document uploaded concurrently is answered once.
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return await _run_long_document(pipeline, text, lang, audio)
+    key = request_key("document", pipeline, lang, audio, text)
+    return await single_flight.run(key, lambda: _run_long_document(pipeline, text, lang, audio))
+
+
+async def _run_long_document(pipeline: str, text: str, lang: str, audio: bool):
+    template = PIPELINES[pipeline]
+
+    parts = split_parts(text)
+    print(f"Long document: {estimate_tokens(text)} tokens in {len(parts)} parts")
+    contexts = await retrieve_per_part(parts)
+    summaries = await summarize_parts(parts, contexts)
+
+    question = f"I uploaded a document. Here are summaries of its {len(parts)} parts:\n\n" + "\n\n".join(
+        f"Part {index + 1}: {summary}" for index, summary in enumerate(summaries)
+    )
+    # Each part's best-matching statute chunk first, then the rest, so the
+    # reduce context covers every part before it spends budget on depth.
+    ranked = [documents[0] for documents in contexts if documents]
+    ranked += [doc for documents in contexts for doc in documents[1:]]
+    prompt, _sources = build_prompt(template, ranked, question, REDUCE_CONTEXT_TOKENS, lang=lang)
+
+    with span("llm", pipeline=f"{pipeline}:reduce"):
+        response = await chat_gateway.ainvoke(prompt)
+    record_prompt_tokens(prompt, response)
+
+    return await finish_answer(response.content, lang, audio)
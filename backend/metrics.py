@@ -0,0 +1,111 @@
+"""
+Prometheus text-format metrics.
+
+Counters and histograms are recorded in-process, so with several gunicorn
+workers each worker reports its own series; Prometheus sums them. The stats
+the caches and services already keep are exported as gauges alongside.
+"""
+import threading
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket, +Inf count, sum]
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            counts, total = self.values.setdefault(key, ([0] * len(self.buckets), [0, 0.0]))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            total[0] += 1
+            total[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, (count, total)) in sorted(self.values.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.labels + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labels + ("le",), key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.stats_sources = []
+
+    def counter(self, name: str, help_text: str, labels=()) -> Counter:
+        counter = Counter(name, help_text, labels)
+        self.metrics.append(counter)
+        return counter
+
+    def histogram(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        histogram = Histogram(name, help_text, labels, buckets)
+        self.metrics.append(histogram)
+        return histogram
+
+    def register_stats(self, prefix: str, stats):
+        """Exports every numeric value of `stats()` as a gauge named `pravaah_<prefix>_<key>`."""
+        self.stats_sources.append((prefix, stats))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for prefix, stats in self.stats_sources:
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Could not collect {prefix} stats: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"pravaah_{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
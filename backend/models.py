@@ -1,9 +1,49 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator, model_validator
+
+from statutes import ACTS, resolve_act
 
 class ResponseBody(BaseModel):
     text: str
-    audio_path: str
+    # In background audio mode the clip may still be synthesizing; poll
+    # /audio-jobs/{audio_job} until it is done.
+    audio_path: str | None = None
+    audio_job: str | None = None
+
+class ActScope(BaseModel):
+    # Restricts retrieval to these acts (by file name, name or abbreviation,
+    # e.g. "IPC") and/or to acts passed in `year`. After validation `acts`
+    # holds the ACTS keys in scope. Without either, acts the query names are
+    # searched.
+    acts: list[str] | None = None
+    year: int | None = None
+
+    @field_validator("acts")
+    @classmethod
+    def resolve_acts(cls, acts):
+        if not acts:
+            return None
+        resolved = []
+        for act in acts:
+            file_name = resolve_act(act)
+            if file_name is None:
+                raise ValueError(f"Unknown act {act!r}.")
+            resolved.append(file_name)
+        return list(dict.fromkeys(resolved))
 
-class QueryRequest(BaseModel):
+    @model_validator(mode="after")
+    def apply_year(self):
+        if self.year is not None:
+            self.acts = [act for act in (self.acts or ACTS) if ACTS[act]["year"] == self.year]
+            if not self.acts:
+                raise ValueError(f"No act in scope was passed in {self.year}.")
+        return self
+
+class QueryRequest(ActScope):
     query: str
     language: str = "eng"
+    audio: bool = True
+
+class BatchQueryRequest(ActScope):
+    queries: list[str]
+    language: str = "eng"
+    audio: bool = True
@@ -1,84 +1,322 @@
 import asyncio
+import re
+from collections import OrderedDict
 import edge_tts
 from dotenv import load_dotenv
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+
+from audio_cache import audio_cache
+from llm_gateway import translation_gateway
+from tracing import span
 
 load_dotenv()
 
+TTS_RATE = "+10%"  # Adjusts the speed (negative values slow it down)
+
+# Sentence boundaries for the supported languages; Hindi ends sentences with
+# the danda (।) rather than a full stop.
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?।])\s+")
+SENTENCE_SEPARATOR = re.compile(r"((?<=[.!?।])\s+)")
+
+# Answers are spoken in segments of whole sentences up to this many
+# characters, so translating one segment overlaps with synthesizing another.
+TTS_SEGMENT_CHARS = int(os.getenv("TTS_SEGMENT_CHARS", "400"))
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "3"))
+TRANSLATE_CONCURRENCY = int(os.getenv("TRANSLATE_CONCURRENCY", "2"))
+
+
+# Language code -> (name used in prompts, edge-tts voice).
+LANGUAGES = {
+    "eng": ("english", "en-US-AriaNeural"),
+    "hin": ("hindi", "hi-IN-MadhurNeural"),
+    "kan": ("kannada", "kn-IN-SapnaNeural"),
+    "tam": ("tamil", "ta-IN-PallaviNeural"),
+    "mal": ("malayalam", "ml-IN-MidhunNeural"),
+    "tel": ("telugu", "te-IN-MohanNeural"),
+}
+
+TRANSLATION_MEMORY_SIZE = int(os.getenv("TRANSLATION_MEMORY_SIZE", "5000"))
+
+# Splits text into translatable segments while keeping the separators, so
+# line breaks and markdown structure survive translation.
+SEGMENT_SEPARATOR = re.compile(r"((?<=[.!?।])[ \t]+|\s*\n\s*)")
+NUMBERED_LINE = re.compile(r"^\s*<(\d+)>\s?(.*)$")
+
+
+class TranslationMemory:
+    """
+    Previously translated segments, keyed by language and source text. The
+    fixed disclaimers every answer ends with are translated once and then
+    always served from here.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, lang: str, text: str) -> str | None:
+        translation = self.entries.get((lang, text))
+        if translation is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end((lang, text))
+        return translation
+
+    def put(self, lang: str, text: str, translation: str):
+        self.entries[(lang, text)] = translation
+        self.entries.move_to_end((lang, text))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
 
-def translate(prompt, lang):
+translation_memory = TranslationMemory(TRANSLATION_MEMORY_SIZE)
+
+_translation_chains = {}
+
+
+def translation_chain(numbered: bool):
+    """
+    The translation chains are built once and call Gemini through the
+    translation gateway, which reuses a single client for every request.
+    """
+    if numbered not in _translation_chains:
+        if numbered:
+            instruction = (
+                "Translate each numbered line of the user's text to {lang}. Keep the "
+                "<number> marker at the start of every line and return exactly one line "
+                "per marker, in the same order. Return only the translated lines."
+            )
+        else:
+            instruction = "Translate the following text to {lang}:"
+
+        # A more structured prompt template separates instructions from user input.
+        prompt_template = ChatPromptTemplate.from_messages(
+            [
+                ("system", "You are an expert language translator. Your task is to translate the user's text into the specified language. Return only the translated text and nothing else."),
+                ("human", instruction + "\n\n{text_to_translate}"),
+            ]
+        )
+
+        # Create the chain by piping the components together; the parser
+        # ensures we get a clean string as the final output.
+        _translation_chains[numbered] = (
+            prompt_template | RunnableLambda(translation_gateway.ainvoke) | StrOutputParser()
+        )
+    return _translation_chains[numbered]
+
+
+async def translate(prompt, lang):
     """
     Translates a given text to a specified language using LangChain and Google's Gemini.
+
+    The text is split into sentences; sentences already in the translation
+    memory are reused and the rest are translated together in one call as
+    numbered lines. If the model does not return every numbered line, the
+    whole text is translated in one piece instead.
+    """
+    with span("translation", lang=lang, chars=len(prompt)):
+        return await _translate(prompt, lang)
+
+
+async def _translate(prompt, lang):
+    parts = SEGMENT_SEPARATOR.split(prompt)
+    segments = parts[0::2]
+
+    translated = [translation_memory.get(lang, segment) if segment.strip() else segment for segment in segments]
+    missing = [index for index, text in enumerate(translated) if text is None]
+
+    if missing:
+        numbered_text = "\n".join(f"<{n}> {segments[index]}" for n, index in enumerate(missing))
+        response = await translation_chain(numbered=True).ainvoke(
+            {"text_to_translate": numbered_text, "lang": lang}
+        )
+        lines = {}
+        for line in response.splitlines():
+            match = NUMBERED_LINE.match(line)
+            if match:
+                lines[int(match.group(1))] = match.group(2)
+
+        if len(lines) != len(missing) or set(lines) != set(range(len(missing))):
+            print("Numbered translation was incomplete; translating the whole text.")
+            return await translation_chain(numbered=False).ainvoke(
+                {"text_to_translate": prompt, "lang": lang}
+            )
+
+        for n, index in enumerate(missing):
+            translated[index] = lines[n]
+            translation_memory.put(lang, segments[index], lines[n])
+
+    # Re-interleave the translated segments with the original separators.
+    parts[0::2] = translated
+    return "".join(parts)
+
+
+async def translater(lang, script):
+    if lang not in LANGUAGES:
+        return None, None
+
+    language, model = LANGUAGES[lang]
+    if lang == "eng":
+        return script, model
+    return await translate(script, language), model
+
+
+async def synthesize(text, voice_model) -> tuple[str, bytes]:
+    """
+    Synthesizes `text` with edge-tts, reusing a cached clip when the same
+    text, voice and rate have been synthesized before. Returns the clip's
+    audio cache key and its bytes; callers joining clips use the bytes, since
+    the cached file may be evicted at any time.
     """
-    # Note: I've corrected the model name to "gemini-1.5-flash"
-    # as "gemini-2.5-flash" is not a valid model name.
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
-
-    # A more structured prompt template separates instructions from user input.
-    prompt_template = ChatPromptTemplate.from_messages(
-        [
-            ("system", "You are an expert language translator. Your task is to translate the user's text into the specified language. Return only the translated text and nothing else."),
-            ("human", "Translate the following text to {lang}:\n\n{text_to_translate}"),
-        ]
-    )
-
-    # The parser ensures we get a clean string as the final output.
-    output_parser = StrOutputParser()
-
-    # Create the chain by piping the components together.
-    chain = prompt_template | llm | output_parser
-
-    # Invoke the chain with the required variables.
-    translated_text = chain.invoke({
-        "text_to_translate": prompt,
-        "lang": lang
-    })
-
-    return translated_text
-
-
-def translater(lang, script):
-    model = None
-    tran_script = None
-    match lang:
-        case "eng":
-            model = "en-US-AriaNeural"
-            tran_script = script
-        case "hin":
-            tran_script = translate(script, "hindi")
-            model = "hi-IN-MadhurNeural"
-        case "kan":
-            tran_script = translate(script, "kannada")
-            model = "kn-IN-SapnaNeural"
-        case "tam":
-            tran_script = translate(script, "tamil")
-            model = "ta-IN-PallaviNeural"
-        case "mal":
-            tran_script = translate(script, "malayalam")
-            model = "ml-IN-MidhunNeural"
-        case "tel":
-            tran_script = translate(script, "telugu")
-            model = "te-IN-MohanNeural"
-
-    return tran_script, model
+    key = audio_cache.key(text, voice_model, TTS_RATE)
+    path = audio_cache.get(key)
+    if path:
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            print(f"Speech served from cache: {key}")
+            return key, audio
+        except FileNotFoundError:
+            # Evicted since the lookup: synthesize it again.
+            pass
+
+    temp_path = audio_cache.temp_path_for(key)
+    try:
+        communicate = edge_tts.Communicate(text, voice_model, rate=TTS_RATE)
+        with span("tts", voice=voice_model, chars=len(text)):
+            await communicate.save(temp_path)
+        with open(temp_path, "rb") as f:
+            audio = f.read()
+        audio_cache.commit(key, temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    print(f"Speech saved as {audio_cache.path_for(key)}")
+    return key, audio
 
 
 async def generate_tts(text, voice_model):
-    if not os.path.exists("static"):
-        os.makedirs("static")
+    """Synthesizes `text` and returns the clip's URL path under /static."""
+    key, _audio = await synthesize(text, voice_model)
+    return audio_cache.url_for(key)
+
+
+def split_sentences(text: str) -> list[str]:
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+async def stream_tts(text, voice_model):
+    """Yields MP3 bytes for `text` as edge-tts produces them."""
+    communicate = edge_tts.Communicate(text, voice_model, rate=TTS_RATE)
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            yield chunk["data"]
+
+
+def split_segments(text: str) -> list[str]:
+    """
+    Groups sentences into segments of about TTS_SEGMENT_CHARS. Each segment
+    keeps the whitespace that followed it, so joining them restores the text.
+    """
+    parts = SENTENCE_SEPARATOR.split(text)
+    segments, current = [], ""
+    for sentence, separator in zip(parts[0::2], parts[1::2] + [""]):
+        if current.strip() and len(current) + len(sentence) > TTS_SEGMENT_CHARS:
+            segments.append(current)
+            current = ""
+        current += sentence + separator
+    if current.strip():
+        segments.append(current)
+    return segments
+
+
+async def generate_audio_output(text: str, lang: str, translated: bool = False):
+    """
+    Translates `text` into `lang` (unless it was already generated in that
+    language) and synthesizes it. Returns the final text and its audio path.
+
+    Long answers are processed segment by segment: while one segment is
+    being synthesized the next is being translated, with at most
+    TRANSLATE_CONCURRENCY translations and TTS_CONCURRENCY syntheses in
+    flight. The segment clips are then concatenated into a single MP3, which
+    edge-tts makes possible by emitting bare MP3 frames with no header.
+    """
+    language, voice_model = LANGUAGES[lang]
+    needs_translation = lang != "eng" and not translated
+
+    segments = split_segments(text)
+    if len(segments) <= 1:
+        restext = await translate(text, language) if needs_translation else text
+        return restext, await generate_tts(restext, voice_model)
 
-    output_file = "static/output.mp3"
-    rate = "+10%"  # Adjusts the speed (negative values slow it down)
+    translate_slots = asyncio.Semaphore(TRANSLATE_CONCURRENCY)
+    tts_slots = asyncio.Semaphore(TTS_CONCURRENCY)
+
+    async def process(segment: str) -> tuple[str, bytes]:
+        body = segment.strip()
+        if needs_translation:
+            async with translate_slots:
+                body = await translate(body, language)
+        async with tts_slots:
+            _key, audio = await synthesize(body, voice_model)
+        # Keep the whitespace that separated this segment from the next.
+        return body + segment[len(segment.rstrip()):], audio
+
+    results = await asyncio.gather(*(process(segment) for segment in segments))
+    restext = "".join(body for body, _audio in results).strip()
+    return restext, concatenate_clips(restext, voice_model, [audio for _body, audio in results])
+
+
+def concatenate_clips(text: str, voice_model: str, clips: list[bytes]) -> str:
+    """Stores the segment clips of `text` as one MP3 and returns its URL path."""
+    key = audio_cache.key(text, voice_model, TTS_RATE)
+    if not audio_cache.get(key):
+        temp_path = audio_cache.temp_path_for(key)
+        try:
+            with open(temp_path, "wb") as f:
+                for audio in clips:
+                    f.write(audio)
+            audio_cache.commit(key, temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return audio_cache.url_for(key)
+
+
+async def synthesize_answer(text: str, voice_model: str) -> str:
+    """
+    Synthesizes an answer that is already in its final language, segment by
+    segment with at most TTS_CONCURRENCY segments in flight. Returns the
+    URL path of the combined clip, which is cached under the same key as a
+    single-call synthesis of `text`.
+    """
+    text = text.strip()
+    segments = split_segments(text)
+    if len(segments) <= 1:
+        return await generate_tts(text, voice_model)
 
-    communicate = edge_tts.Communicate(text, voice_model, rate=rate)
-    await communicate.save(output_file)
-    print(f"Speech saved as {output_file}")
+    tts_slots = asyncio.Semaphore(TTS_CONCURRENCY)
 
+    async def process(segment: str) -> bytes:
+        async with tts_slots:
+            _key, audio = await synthesize(segment.strip(), voice_model)
+        return audio
 
-async def generate_audio_output(text: str, lang: str):
-    restext, voice_model = translater(lang=lang, script=text)
-    await generate_tts(restext, voice_model)
-    return restext, "static/output.mp3"
\ No newline at end of file
+    clips = await asyncio.gather(*(process(segment) for segment in segments))
+    return concatenate_clips(text, voice_model, clips)
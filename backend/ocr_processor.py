@@ -1,13 +1,67 @@
+import asyncio
+import io
+import multiprocessing
 import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 import pytesseract
 from PIL import Image
-from pdf2image import convert_from_path
 import fitz  # PyMuPDF
 
+from tracing import span
+
 # --- Configuration ---
 # On Windows, you might need to uncomment and set this path if Tesseract is not in your system's PATH.
 # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
+# OCR runs in a dedicated process pool so a long scan never blocks the event loop.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "50"))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT_SECONDS", "300"))
+# Tesseract language packs to OCR with, e.g. "eng+hin" for notices in Hindi.
+OCR_LANGUAGES = os.getenv("OCR_LANGUAGES", "eng")
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+OCR_MIN_DPI = int(os.getenv("OCR_MIN_DPI", "150"))
+OCR_MAX_DPI = int(os.getenv("OCR_MAX_DPI", "300"))
+
+# Page classification: a page is OCR'd if its text layer has fewer than
+# PAGE_MIN_TEXT_CHARS characters, or if images cover at least
+# PAGE_IMAGE_COVERAGE of it and it has fewer than PAGE_MIXED_TEXT_CHARS
+# characters (a scan with a thin text layer such as a stamp or page number).
+PAGE_MIN_TEXT_CHARS = int(os.getenv("PAGE_MIN_TEXT_CHARS", "50"))
+PAGE_MIXED_TEXT_CHARS = int(os.getenv("PAGE_MIXED_TEXT_CHARS", "500"))
+PAGE_IMAGE_COVERAGE = float(os.getenv("PAGE_IMAGE_COVERAGE", "0.6"))
+# At most this many uploads are OCR'd at once; further ones wait up to
+# OCR_QUEUE_TIMEOUT seconds for a slot and are then turned away.
+OCR_MAX_CONCURRENT_JOBS = int(os.getenv("OCR_MAX_CONCURRENT_JOBS", "2"))
+OCR_QUEUE_TIMEOUT = float(os.getenv("OCR_QUEUE_TIMEOUT_SECONDS", "10"))
+
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']
+
+_ocr_pool = None
+_ocr_slots = None
+
+
+class OcrBusyError(Exception):
+    """Raised when every OCR slot is taken and the wait for one timed out."""
+
+
+def ocr_settings_key() -> str:
+    """Identifies the settings that affect extracted text, for cache keys."""
+    return "|".join(
+        str(setting)
+        for setting in (
+            OCR_LANGUAGES,
+            OCR_DPI,
+            OCR_MIN_DPI,
+            OCR_MAX_DPI,
+            PAGE_MIN_TEXT_CHARS,
+            PAGE_MIXED_TEXT_CHARS,
+            PAGE_IMAGE_COVERAGE,
+        )
+    )
+
 
 def process_file_to_text(input_path: str) -> tuple[bool, str]:
     """
@@ -36,7 +90,7 @@ def process_file_to_text(input_path: str) -> tuple[bool, str]:
 
         if file_extension == '.pdf':
             return _process_pdf(input_path)
-        elif file_extension in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']:
+        elif file_extension in IMAGE_EXTENSIONS:
             return _process_image(input_path)
         elif file_extension == '.txt':
             return _process_txt(input_path)
@@ -63,45 +117,269 @@ def _process_image(file_path: str) -> tuple[bool, str]:
     """Performs OCR on a single image file."""
     print(f"Processing image file with OCR: {os.path.basename(file_path)}")
     try:
-        text = pytesseract.image_to_string(Image.open(file_path))
+        text = pytesseract.image_to_string(Image.open(file_path), lang=OCR_LANGUAGES)
         return True, text
     except Exception as e:
         print(f"Error performing OCR on image {file_path}: {e}")
         return False, "Failed to perform OCR on the image."
 
 
+def _classify_page(page) -> tuple[str, bool, int]:
+    """
+    Returns the page's text layer, whether it needs OCR and the DPI to
+    rasterize it at. Scanned pages are rendered at the resolution of their
+    embedded scan (clamped to OCR_MIN_DPI..OCR_MAX_DPI) so small scans are not
+    upsampled for nothing and large ones keep their detail.
+    """
+    text = page.get_text()
+    chars = len(text.strip())
+    page_area = abs(page.rect) or 1
+
+    coverage = 0.0
+    native_dpi = 0
+    for image in page.get_image_info():
+        bbox = fitz.Rect(image["bbox"]) & page.rect
+        coverage += abs(bbox) / page_area
+        if bbox.width > 0 and image.get("width"):
+            native_dpi = max(native_dpi, int(image["width"] / (bbox.width / 72)))
+    coverage = min(coverage, 1.0)
+    dpi = max(OCR_MIN_DPI, min(OCR_MAX_DPI, native_dpi)) if native_dpi else OCR_DPI
+
+    needs_ocr = chars < PAGE_MIN_TEXT_CHARS or (
+        coverage >= PAGE_IMAGE_COVERAGE and chars < PAGE_MIXED_TEXT_CHARS
+    )
+    return text, needs_ocr, dpi
+
+
+def _open_pdf(source: str | bytes):
+    """Opens a PDF from a path, or straight from memory when given its bytes."""
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _classify_pages(source: str | bytes) -> list[tuple[str, bool, int]]:
+    with _open_pdf(source) as doc:
+        return [_classify_page(page) for page in doc]
+
+
+def _merge_pages(pages, ocr_texts: dict) -> str:
+    """Joins digital and OCR'd page text back together in page order."""
+    return "".join(
+        (ocr_texts[index] if needs_ocr else text) + "\n\n"
+        for index, (text, needs_ocr, _dpi) in enumerate(pages)
+    )
+
+
 def _process_pdf(file_path: str) -> tuple[bool, str]:
     """
-    Processes a PDF by first trying direct text extraction, then falling back to OCR.
+    Processes a PDF page by page: pages with a usable text layer are read
+    directly, and only the pages that need it are rasterized and OCR'd.
     """
-    # --- Step 1: Attempt to extract text directly (for digital PDFs) ---
-    print(f"Attempting direct text extraction from PDF: {os.path.basename(file_path)}")
+    print(f"Classifying PDF pages: {os.path.basename(file_path)}")
     try:
-        with fitz.open(file_path) as doc:
-            full_text = "".join(page.get_text() for page in doc)
-
-        # Heuristic: If we get a reasonable amount of text, assume it's a digital PDF and we're done.
-        if len(full_text.strip()) > 100:  # You can adjust this threshold
-            print("Direct text extraction successful.")
-            return True, full_text
-        else:
-            print("Direct text extraction yielded minimal text. Proceeding to OCR fallback.")
+        pages = _classify_pages(file_path)
     except Exception as e:
-        print(f"Direct text extraction failed: {e}. Proceeding to OCR fallback.")
+        print(f"Could not read PDF {file_path}: {e}")
+        return False, "Failed to read the PDF file."
 
-    # --- Step 2: Fallback to OCR (for scanned/image-based PDFs) ---
-    print(f"Processing PDF with OCR: {os.path.basename(file_path)}")
+    ocr_indexes = [index for index, (_text, needs_ocr, _dpi) in enumerate(pages) if needs_ocr]
+    print(f"{len(pages) - len(ocr_indexes)} digital pages, {len(ocr_indexes)} pages need OCR.")
     try:
-        images = convert_from_path(file_path)
-        # CORRECTED: Initialized a new variable for OCR text to avoid the UnboundLocalError
-        ocr_text = ""
-        for i, image in enumerate(images):
-            print(f"  - OCR on page {i + 1}/{len(images)}")
-            text = pytesseract.image_to_string(image)
-            ocr_text += text + "\n\n"  # Add page breaks for clarity
-
-        return True, ocr_text
+        ocr_texts = {}
+        for index in ocr_indexes:
+            print(f"  - OCR on page {index + 1}/{len(pages)}")
+            ocr_texts[index] = _ocr_pdf_page(file_path, index, pages[index][2])
+        return True, _merge_pages(pages, ocr_texts)
     except Exception as e:
         print(f"OCR processing for PDF {file_path} failed: {e}")
         return False, "Failed to perform OCR on the PDF file."
 
+
+def _ocr_pool_executor() -> ProcessPoolExecutor:
+    global _ocr_pool
+    if _ocr_pool is None:
+        # spawn rather than fork: the API process has torch and gRPC threads
+        # running, which are not safe to fork.
+        _ocr_pool = ProcessPoolExecutor(
+            max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _ocr_pool
+
+
+def _ocr_pdf_page(file_path: str, page_index: int, dpi: int) -> str:
+    """
+    Runs in an OCR worker: rasterizes a single page and OCRs it. Only one
+    page image per worker is ever in memory.
+    """
+    with fitz.open(file_path) as doc:
+        pixmap = doc[page_index].get_pixmap(dpi=dpi)
+    image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+    return pytesseract.image_to_string(image, lang=OCR_LANGUAGES)
+
+
+def _ocr_image_bytes(data: bytes) -> str:
+    return pytesseract.image_to_string(Image.open(io.BytesIO(data)), lang=OCR_LANGUAGES)
+
+
+def _when_finished(futures: list, callback):
+    """
+    Calls `callback` on the event loop once every pool future has finished,
+    or at once if they all have. Cancelled pages finish immediately; pages
+    already running on a worker only when the worker is done with them.
+    """
+    loop = asyncio.get_running_loop()
+    pending = [future for future in futures if not future.done()]
+    if not pending:
+        callback()
+        return
+
+    remaining = len(pending)
+    lock = threading.Lock()
+
+    def finished(_future):
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            last = remaining == 0
+        if last:
+            try:
+                loop.call_soon_threadsafe(callback)
+            except RuntimeError:
+                pass  # The loop has closed; so has the slot.
+
+    for future in pending:
+        future.add_done_callback(finished)
+
+
+async def _ocr_pdf_pages(file_path: str, pages: list[tuple[int, int]], futures: list) -> dict:
+    """
+    OCRs the given (page index, dpi) pairs in the pool; returns text by page
+    index. The pool futures are appended to `futures` so the caller can tell
+    when the workers are free again.
+    """
+    pool = _ocr_pool_executor()
+    futures.extend(pool.submit(_ocr_pdf_page, file_path, index, dpi) for index, dpi in pages)
+
+    async def timed(future, index: int, dpi: int) -> str:
+        # Includes the time the page waited for a free worker.
+        with span("ocr_page", page=index + 1, dpi=dpi):
+            return await asyncio.wrap_future(future)
+
+    try:
+        texts = await asyncio.wait_for(
+            asyncio.gather(*(timed(future, index, dpi) for future, (index, dpi) in zip(futures, pages))),
+            timeout=OCR_TIMEOUT,
+        )
+    except BaseException:
+        # Free the pool for other uploads: pages not yet started are dropped.
+        for future in futures:
+            future.cancel()
+        raise
+    return {index: text for (index, _dpi), text in zip(pages, texts)}
+
+
+async def process_file_to_text_async(input_path: str) -> tuple[bool, str]:
+    """
+    The non-blocking counterpart of `process_file_to_text`, for a file
+    already on disk. See `process_bytes_to_text_async`.
+    """
+    if not os.path.exists(input_path):
+        return False, "Error: File not found at the specified path."
+
+    file_extension = os.path.splitext(input_path)[1].lower()
+    if file_extension == '.txt':
+        return await asyncio.to_thread(_process_txt, input_path)
+    with open(input_path, "rb") as f:
+        data = f.read()
+    return await process_bytes_to_text_async(
+        data, file_extension, os.path.dirname(input_path), pdf_path=input_path
+    )
+
+
+async def process_bytes_to_text_async(
+    data: bytes, file_extension: str, scratch_directory: str, pdf_path: str | None = None
+) -> tuple[bool, str]:
+    """
+    Extracts text from an upload held in memory, used by the upload handlers.
+
+    PDF pages are classified on a worker thread straight from `data`; only
+    pages without a usable text layer are OCR'd, page by page in the OCR
+    process pool, limited to OCR_MAX_PAGES such pages and OCR_TIMEOUT
+    seconds per upload. The OCR workers are separate processes, so a PDF
+    that needs OCR is written once to `scratch_directory` (unless
+    `pdf_path` already holds it) for them to open; images are sent to the
+    worker as bytes. Raises OcrBusyError if OCR_MAX_CONCURRENT_JOBS uploads
+    are already being OCR'd and no slot frees up in time.
+    """
+    if file_extension == '.txt':
+        return True, data.decode("utf-8", errors="replace")
+    if file_extension not in IMAGE_EXTENSIONS and file_extension != '.pdf':
+        return False, f"Unsupported file type: {file_extension}"
+
+    pages = None
+    ocr_pages = []
+    if file_extension == '.pdf':
+        print(f"Classifying PDF pages ({len(data)} bytes)")
+        try:
+            with span("pdf_classify"):
+                pages = await asyncio.to_thread(_classify_pages, data)
+        except Exception as e:
+            print(f"Could not read PDF: {e}")
+            return False, "Failed to read the PDF file."
+
+        ocr_pages = [
+            (index, dpi) for index, (_text, needs_ocr, dpi) in enumerate(pages) if needs_ocr
+        ]
+        print(f"{len(pages) - len(ocr_pages)} digital pages, {len(ocr_pages)} pages need OCR.")
+        if not ocr_pages:
+            return True, _merge_pages(pages, {})
+        if len(ocr_pages) > OCR_MAX_PAGES:
+            return False, (
+                f"This document has {len(ocr_pages)} scanned pages; "
+                f"OCR is limited to {OCR_MAX_PAGES} pages per upload."
+            )
+
+    global _ocr_slots
+    if _ocr_slots is None:
+        _ocr_slots = asyncio.Semaphore(OCR_MAX_CONCURRENT_JOBS)
+    try:
+        await asyncio.wait_for(_ocr_slots.acquire(), timeout=OCR_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise OcrBusyError("The OCR service is busy. Please try again shortly.")
+
+    scratch_path = None
+    futures = []
+    try:
+        print(f"Processing with OCR ({len(data)} bytes)")
+        if file_extension == '.pdf':
+            if pdf_path is None:
+                scratch_path = os.path.join(scratch_directory, f"{uuid.uuid4().hex}.pdf")
+                with span("upload_write", size=len(data)):
+                    await asyncio.to_thread(_write_file, scratch_path, data)
+            ocr_texts = await _ocr_pdf_pages(pdf_path or scratch_path, ocr_pages, futures)
+            return True, _merge_pages(pages, ocr_texts)
+        futures.append(_ocr_pool_executor().submit(_ocr_image_bytes, data))
+        with span("ocr_image"):
+            text = await asyncio.wait_for(asyncio.wrap_future(futures[0]), timeout=OCR_TIMEOUT)
+        return True, text
+    except asyncio.TimeoutError:
+        return False, f"OCR did not finish within {OCR_TIMEOUT:.0f} seconds."
+    except Exception as e:
+        print(f"OCR processing failed: {e}")
+        return False, "Failed to perform OCR on the file."
+    finally:
+        # After a timeout, pages already running keep their workers busy, so
+        # the slot (and the file they read) is only given up once they finish.
+        _when_finished(futures, lambda: _release_slot(scratch_path))
+
+
+def _release_slot(scratch_path: str | None):
+    _ocr_slots.release()
+    if scratch_path and os.path.exists(scratch_path):
+        os.remove(scratch_path)
+
+
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
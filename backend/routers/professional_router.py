@@ -1,11 +1,14 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 import os
-import uuid
-import shutil
 from dotenv import load_dotenv
-from models import QueryRequest, ResponseBody
-from llm import professional_summarizer, professional_advisor
-from ocr_processor import process_file_to_text
+from models import BatchQueryRequest, QueryRequest, ResponseBody
+from streaming import ndjson_response, sse_response
+from llm import professional_summarizer, professional_advisor, stream_pipeline
+from ocr_processor import OcrBusyError
+from llm_gateway import LLMUnavailableError
+from uploads import extract_upload_text
+from long_document import is_long_document, run_long_document
+from batch import BATCH_MAX_FILES, BATCH_MAX_QUERIES, read_uploads, run_document_batch, run_query_batch
 
 load_dotenv()
 
@@ -18,7 +21,7 @@ os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
 router = APIRouter(prefix="/professional", tags=["Professional Summarizer and Advisor"])
 
 @router.post("/upload-file-professional-summarizer/", response_model=ResponseBody)
-async def handle_upload_file_professional_summarizer(language: str, file: UploadFile = File(...)):
+async def handle_upload_file_professional_summarizer(language: str, file: UploadFile = File(...), audio: bool = True):
     """
     Accepts a file (PDF, PNG, JPG), extracts text using the ocr_processor,
     and returns the text.
@@ -30,32 +33,31 @@ async def handle_upload_file_professional_summarizer(language: str, file: Upload
             status_code=400, detail=f"Invalid file type. Allowed: {allowed_extensions}"
         )
 
-    temp_path = os.path.join(UPLOAD_DIRECTORY, f"{uuid.uuid4().hex}_{file.filename}")
     try:
-        # Save the uploaded file temporarily
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Process the saved file to extract text
-        success, content = process_file_to_text(temp_path)
+        # Save the uploaded file temporarily and extract its text
+        success, content = await extract_upload_text(file, UPLOAD_DIRECTORY)
 
         if not success:
             # If processing fails, return the error message from the processor
             raise HTTPException(status_code=500, detail=content)
 
-        return await handle_query_professional_summarizer(QueryRequest(query=content, language=language))
+        if is_long_document(content):
+            response_text, audio_url, audio_job = await run_long_document("professional_summarizer", content, language, audio)
+            return ResponseBody(text=response_text, audio_path=audio_url, audio_job=audio_job)
+
+        return await handle_query_professional_summarizer(QueryRequest(query=content, language=language, audio=audio))
+    except HTTPException:
+        raise
+    except (OcrBusyError, LLMUnavailableError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
         )
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
 
 @router.post("/upload-file-professional-advisor/", response_model=ResponseBody)
-async def handle_upload_file_professional_advisor(language: str, file: UploadFile = File(...)):
+async def handle_upload_file_professional_advisor(language: str, file: UploadFile = File(...), audio: bool = True):
     
     allowed_extensions = {".pdf", ".png", ".jpg", ".jpeg"}
     file_ext = os.path.splitext(file.filename)[1].lower()
@@ -64,28 +66,27 @@ async def handle_upload_file_professional_advisor(language: str, file: UploadFil
             status_code=400, detail=f"Invalid file type. Allowed: {allowed_extensions}"
         )
 
-    temp_path = os.path.join(UPLOAD_DIRECTORY, f"{uuid.uuid4().hex}_{file.filename}")
     try:
-        # Save the uploaded file temporarily
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Process the saved file to extract text
-        success, content = process_file_to_text(temp_path)
+        # Save the uploaded file temporarily and extract its text
+        success, content = await extract_upload_text(file, UPLOAD_DIRECTORY)
 
         if not success:
             # If processing fails, return the error message from the processor
             raise HTTPException(status_code=500, detail=content)
 
-        return await handle_query_professional_advisor(QueryRequest(query=content, language=language))
+        if is_long_document(content):
+            response_text, audio_url, audio_job = await run_long_document("professional_advisor", content, language, audio)
+            return ResponseBody(text=response_text, audio_path=audio_url, audio_job=audio_job)
+
+        return await handle_query_professional_advisor(QueryRequest(query=content, language=language, audio=audio))
+    except HTTPException:
+        raise
+    except (OcrBusyError, LLMUnavailableError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
         )
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
 
 
@@ -100,9 +101,9 @@ async def handle_query_professional_summarizer(data: QueryRequest):
 
     # Step 1: Get the text-based answer from the RAG system
     print(f"Received query: {query}")
-    response_text, audio_url = await professional_summarizer(query, data.language)
+    response_text, audio_url, audio_job = await professional_summarizer(query, data.language, data.audio, data.acts)
 
-    return ResponseBody(text=response_text, audio_path=audio_url)
+    return ResponseBody(text=response_text, audio_path=audio_url, audio_job=audio_job)
 
 
 @router.post("/query-professional-advisor/", response_model=ResponseBody)
@@ -116,8 +117,96 @@ async def handle_query_professional_advisor(data: QueryRequest):
 
     # Step 1: Get the text-based answer from the RAG system
     print(f"Received query: {query}")
-    response_text, audio_url = await professional_advisor(query, data.language)
+    response_text, audio_url, audio_job = await professional_advisor(query, data.language, data.audio, data.acts)
+
+    return ResponseBody(text=response_text, audio_path=audio_url, audio_job=audio_job)
+
+
+@router.post("/query-professional-summarizer/stream/")
+async def handle_query_professional_summarizer_stream(data: QueryRequest):
+    if not data.query:
+        raise HTTPException(
+            status_code=400, detail="Query is required in the request body."
+        )
+
+    print(f"Received streaming query: {data.query}")
+    return sse_response(stream_pipeline("professional_summarizer", data.query, data.language, data.audio, data.acts))
+
+
+@router.post("/query-professional-advisor/stream/")
+async def handle_query_professional_advisor_stream(data: QueryRequest):
+    if not data.query:
+        raise HTTPException(
+            status_code=400, detail="Query is required in the request body."
+        )
+
+    print(f"Received streaming query: {data.query}")
+    return sse_response(stream_pipeline("professional_advisor", data.query, data.language, data.audio, data.acts))
+
+
+@router.post("/batch-query-professional-summarizer/")
+async def handle_batch_query_professional_summarizer(data: BatchQueryRequest):
+    """
+    Answers many queries in one request, streaming one NDJSON line per query
+    as it completes, then a summary line.
+    """
+    if not data.queries:
+        raise HTTPException(
+            status_code=400, detail="At least one query is required in the request body."
+        )
+    if len(data.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=413, detail=f"Batches are limited to {BATCH_MAX_QUERIES} queries."
+        )
+
+    print(f"Received batch of {len(data.queries)} queries")
+    return ndjson_response(run_query_batch("professional_summarizer", data.queries, data.language, data.audio, data.acts))
+
+
+@router.post("/batch-upload-professional-summarizer/")
+async def handle_batch_upload_professional_summarizer(language: str, files: list[UploadFile] = File(...), audio: bool = True):
+    """
+    Answers many uploaded files in one request, streaming one NDJSON line per
+    file as it completes, then a summary line.
+    """
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=413, detail=f"Batches are limited to {BATCH_MAX_FILES} files."
+        )
 
-    return ResponseBody(text=response_text, audio_path=audio_url)
+    uploads = await read_uploads(files)
+    return ndjson_response(run_document_batch("professional_summarizer", uploads, language, audio, UPLOAD_DIRECTORY))
 
 
+@router.post("/batch-query-professional-advisor/")
+async def handle_batch_query_professional_advisor(data: BatchQueryRequest):
+    """
+    Answers many queries in one request, streaming one NDJSON line per query
+    as it completes, then a summary line.
+    """
+    if not data.queries:
+        raise HTTPException(
+            status_code=400, detail="At least one query is required in the request body."
+        )
+    if len(data.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=413, detail=f"Batches are limited to {BATCH_MAX_QUERIES} queries."
+        )
+
+    print(f"Received batch of {len(data.queries)} queries")
+    return ndjson_response(run_query_batch("professional_advisor", data.queries, data.language, data.audio, data.acts))
+
+
+@router.post("/batch-upload-professional-advisor/")
+async def handle_batch_upload_professional_advisor(language: str, files: list[UploadFile] = File(...), audio: bool = True):
+    """
+    Answers many uploaded files in one request, streaming one NDJSON line per
+    file as it completes, then a summary line.
+    """
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=413, detail=f"Batches are limited to {BATCH_MAX_FILES} files."
+        )
+
+    uploads = await read_uploads(files)
+    return ndjson_response(run_document_batch("professional_advisor", uploads, language, audio, UPLOAD_DIRECTORY))
@@ -0,0 +1,204 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_PATH = os.getenv(
+    "ANSWER_CACHE_PATH", os.path.join(BASE_DIR, "cache", "answers.pickle")
+)
+# Minimum cosine similarity for a cached answer to be reused. Lowering it
+# raises the hit rate but risks answering a different question; queries that
+# differ only in the provision they cite are kept apart by `answer_scope`.
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL_HOURS", "24")) * 3600
+# New answers are written to disk at most this often, and at shutdown.
+ANSWER_CACHE_SAVE_SECONDS = float(os.getenv("ANSWER_CACHE_SAVE_SECONDS", "30"))
+
+
+class SemanticCache:
+    """
+    Answers keyed by the query's embedding rather than its exact wording.
+
+    A lookup returns the most similar cached answer in the same scope
+    (pipeline and language) if its cosine similarity is at least `threshold`.
+    Entries are evicted least recently used once there are more than
+    `max_entries`, expire after `ttl` seconds, and are all dropped when the
+    corpus version recorded by `vector.add_to_chroma` changes.
+
+    Changes are persisted by `save`, at most every `save_interval` seconds
+    (see `save_due`), so a burst of misses costs one write rather than one
+    each.
+    """
+
+    def __init__(self, path: str, threshold: float, max_entries: int, ttl: float, save_interval: float = 0.0):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.save_interval = save_interval
+        self.corpus_version = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.save_errors = 0
+        self._dirty = False
+        self._saving = False
+        self._last_save = float("-inf")
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Ignoring unreadable answer cache {self.path}: {e}")
+            return
+
+        self.corpus_version = state["corpus_version"]
+        self.entries = state["entries"]
+        print(f"Loaded {len(self.entries)} cached answers from {self.path}")
+
+    def snapshot(self) -> dict:
+        return {"corpus_version": self.corpus_version, "entries": OrderedDict(self.entries)}
+
+    def save_due(self, force: bool = False) -> bool:
+        """
+        Whether there are unsaved changes, no save is running, and the last
+        save was at least `save_interval` ago (unless `force`). A True result
+        claims the next save, so the caller must then call `save`. Call from
+        the event loop, which is also the only writer of `entries`.
+        """
+        if not self._dirty or self._saving:
+            return False
+        if not force and time.monotonic() - self._last_save < self.save_interval:
+            return False
+        self._dirty = False
+        self._saving = True
+        return True
+
+    def save(self, snapshot: dict) -> bool:
+        """
+        Atomically writes a snapshot taken with `snapshot()` to disk. Errors
+        are logged rather than raised: a cache that cannot be persisted must
+        not fail the request that filled it.
+        """
+        temp_path = None
+        try:
+            with self._save_lock:
+                directory = os.path.dirname(self.path)
+                os.makedirs(directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".answers.", suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.path)
+                temp_path = None
+            return True
+        except Exception as e:
+            self.save_errors += 1
+            self._dirty = True
+            print(f"Could not save the answer cache to {self.path}: {e}")
+            return False
+        finally:
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            self._last_save = time.monotonic()
+            self._saving = False
+
+    def check_corpus(self, corpus_version: str):
+        if corpus_version != self.corpus_version:
+            if self.entries:
+                print("Corpus changed; invalidating cached answers.")
+                self._dirty = True
+            self.entries.clear()
+            self.corpus_version = corpus_version
+
+    def lookup(self, scope: str, embedding) -> dict | None:
+        query = _normalize(embedding)
+        now = time.time()
+        best_id, best_score = None, self.threshold
+
+        for entry_id, entry in list(self.entries.items()):
+            if now - entry["created"] > self.ttl:
+                del self.entries[entry_id]
+                continue
+            if entry["scope"] != scope:
+                continue
+            score = float(np.dot(query, entry["embedding"]))
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(best_id)
+        return self.entries[best_id]
+
+    def store(self, scope: str, embedding, text: str):
+        self.entries[uuid.uuid4().hex] = {
+            "scope": scope,
+            "embedding": _normalize(embedding),
+            "text": text,
+            "created": time.time(),
+        }
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._dirty = True
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "save_errors": self.save_errors,
+        }
+
+
+def answer_scope(
+    backend: str, pipeline: str, lang: str, acts: list[str] | None = None, citations: list[str] | None = None
+) -> str:
+    """
+    The scope a cached answer may be reused in. Vectors from different
+    embedding backends are not comparable, and answers about different acts
+    or cited provisions are not interchangeable however alike the questions
+    read: "section 302 IPC" and "section 304 IPC" embed almost identically.
+    """
+    scope = f"{backend}:{pipeline}:{lang}"
+    if acts:
+        scope += ":" + ",".join(sorted(acts))
+    if citations:
+        scope += ":" + ",".join(sorted(citations))
+    return scope
+
+
+def _normalize(embedding):
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+answer_cache = SemanticCache(
+    path=ANSWER_CACHE_PATH,
+    threshold=ANSWER_CACHE_THRESHOLD,
+    max_entries=ANSWER_CACHE_MAX_ENTRIES,
+    ttl=ANSWER_CACHE_TTL,
+    save_interval=ANSWER_CACHE_SAVE_SECONDS,
+)
@@ -0,0 +1,66 @@
+"""
+Coalescing of identical in-flight requests.
+
+When a topic trends, many users send the same question in the same mode and
+language within seconds. The first request (the leader) starts the pipeline
+as a task of its own; identical requests arriving while it runs await that
+task instead of starting another. Every caller awaits it through
+`asyncio.shield`, so a client that disconnects only stops waiting: the shared
+work carries on for the others, and its answer still reaches the caches.
+"""
+import asyncio
+import hashlib
+import os
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+
+def normalize_query(text: str) -> str:
+    """Case and whitespace differences do not change the answer."""
+    return " ".join(text.casefold().split())
+
+
+def request_key(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    def __init__(self):
+        self.calls = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def run(self, key: str, factory):
+        """Returns the result of `factory()`, sharing one execution per key while it runs."""
+        task = self.calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self.calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        # Mark the error as retrieved even if every caller has gone.
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        requests = self.leaders + self.followers
+        return {
+            "in_flight": len(self.calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "coalesced_rate": self.followers / requests if requests else 0.0,
+        }
+
+
+single_flight = SingleFlight()
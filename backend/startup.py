@@ -0,0 +1,164 @@
+"""
+Lazy loading and warm-up of the heavy resources behind the pipelines.
+
+Nothing here runs at import time, so `app` imports (and answers `/` and
+`/healthz`) in well under a second. The embedding model, Chroma store, Gemini
+client and query embedder are created on first use, or ahead of time by
+`warm_up`, which the app starts in the background on startup. The Gemini
+clients are only ever called through llm_gateway.py. Each resource
+is built at most once per process, even when several requests race for it.
+
+Under gunicorn with `preload_app`, `preload()` loads the embedding model in
+the master so that every forked worker shares the same copy-on-write weights
+(see gunicorn.conf.py).
+"""
+import asyncio
+import os
+import threading
+import time
+
+from embedding_service import EMBED_MAX_BATCH_SIZE, EMBED_MAX_WAIT_MS, BatchingEmbedder
+
+# "background" loads everything as soon as the app starts; "lazy" waits for
+# the first request that needs each resource.
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+
+_resources = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+state = {"status": "cold", "error": None, "load_seconds": {}}
+
+
+def _create_embedding_function():
+    from vector import get_embedding_function
+
+    return get_embedding_function()
+
+
+def _create_vector_store():
+    from vector import get_vector_store
+
+    return get_vector_store(embedding_function())
+
+
+# The gateway retries with its own backoff and deadline; retries inside the
+# client would multiply them, so the clients make a single attempt.
+def _create_chat_model():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash", max_retries=1)
+
+
+def _create_translation_model():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model="gemini-2.0-flash", max_retries=1)
+
+
+def _create_lexical_index():
+    from hybrid_index import LexicalIndex
+
+    return LexicalIndex.load()
+
+
+def _create_query_embedder():
+    return BatchingEmbedder(
+        embedding_function(),
+        max_batch_size=EMBED_MAX_BATCH_SIZE,
+        max_wait_ms=EMBED_MAX_WAIT_MS,
+    )
+
+
+_FACTORIES = {
+    "embedding_function": _create_embedding_function,
+    "vector_store": _create_vector_store,
+    "chat_model": _create_chat_model,
+    "translation_model": _create_translation_model,
+    "query_embedder": _create_query_embedder,
+    "lexical_index": _create_lexical_index,
+}
+
+
+def get(name: str):
+    """Returns the named resource, creating it on first use."""
+    if name in _resources:
+        return _resources[name]
+
+    with _locks_guard:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        if name not in _resources:
+            start = time.perf_counter()
+            _resources[name] = _FACTORIES[name]()
+            state["load_seconds"][name] = round(time.perf_counter() - start, 2)
+            print(f"Loaded {name} in {state['load_seconds'][name]}s")
+    return _resources[name]
+
+
+async def aget(name: str):
+    """Like `get`, but loads a missing resource off the event loop."""
+    if name in _resources:
+        return _resources[name]
+    return await asyncio.to_thread(get, name)
+
+
+def is_loaded(name: str) -> bool:
+    return name in _resources
+
+
+def override(name: str, value):
+    """Replaces a resource, e.g. with a fake in the benchmarks."""
+    _resources[name] = value
+
+
+def embedding_function():
+    return get("embedding_function")
+
+
+def vector_store():
+    return get("vector_store")
+
+
+def chat_model():
+    return get("chat_model")
+
+
+def query_embedder():
+    return get("query_embedder")
+
+
+def preload():
+    """Loads the embedding model only. Safe to call before forking workers."""
+    embedding_function()
+
+
+def warm_up():
+    """
+    Loads every resource and runs one query embedding so the first real
+    request does not pay for lazy initialisation inside torch.
+    """
+    state["status"] = "warming"
+    try:
+        for name in _FACTORIES:
+            get(name)
+        embedding_function().embed_query("warm up")
+    except Exception as e:
+        state["status"] = "failed"
+        state["error"] = str(e)
+        print(f"Warm-up failed: {e}")
+        raise
+    state["status"] = "ready"
+
+
+async def warm_up_in_background():
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception:
+        pass
+
+
+def is_ready() -> bool:
+    if WARMUP_MODE == "lazy":
+        return True
+    return all(name in _resources for name in _FACTORIES)
@@ -0,0 +1,161 @@
+"""
+The acts in PDFS/ and how users refer to them.
+
+Keyed by PDF file name. `aliases` are lower-case forms seen in queries,
+including the usual citation abbreviations ("IPC", "CrPC").
+"""
+import os
+import re
+
+ACTS = {
+    "Air Prevention 1981.pdf": {
+        "name": "Air (Prevention and Control of Pollution) Act",
+        "year": 1981,
+        "aliases": ["air act", "air pollution act"],
+    },
+    "BNS.pdf": {
+        "name": "Bharatiya Nyaya Sanhita",
+        "year": 2023,
+        "aliases": ["bns", "bharatiya nyaya sanhita"],
+    },
+    "Citizenship Act 1955.pdf": {
+        "name": "Citizenship Act",
+        "year": 1955,
+        "aliases": ["citizenship act"],
+    },
+    "Civil Procedure 1908.pdf": {
+        "name": "Code of Civil Procedure",
+        "year": 1908,
+        "aliases": ["cpc", "c.p.c", "code of civil procedure", "civil procedure code"],
+    },
+    "Companies Act 2013.pdf": {
+        "name": "Companies Act",
+        "year": 2013,
+        "aliases": ["companies act"],
+    },
+    "Conciliation Act 1996.pdf": {
+        "name": "Arbitration and Conciliation Act",
+        "year": 1996,
+        "aliases": ["arbitration act", "arbitration and conciliation act", "conciliation act"],
+    },
+    "Consumer Act 2019.pdf": {
+        "name": "Consumer Protection Act",
+        "year": 2019,
+        "aliases": ["consumer protection act", "consumer act"],
+    },
+    "Criminal Procedure 1973.pdf": {
+        "name": "Code of Criminal Procedure",
+        "year": 1973,
+        "aliases": ["crpc", "cr.p.c", "code of criminal procedure", "criminal procedure code"],
+    },
+    "Evidence Act 1872.pdf": {
+        "name": "Indian Evidence Act",
+        "year": 1872,
+        "aliases": ["evidence act", "iea"],
+    },
+    "Factories Act 1948.pdf": {
+        "name": "Factories Act",
+        "year": 1948,
+        "aliases": ["factories act"],
+    },
+    "Indian Contract 1872.pdf": {
+        "name": "Indian Contract Act",
+        "year": 1872,
+        "aliases": ["contract act", "indian contract act"],
+    },
+    "Legal Authhorities 1987.pdf": {
+        "name": "Legal Services Authorities Act",
+        "year": 1987,
+        "aliases": ["legal services authorities act", "nalsa act"],
+    },
+    "Limitation Act 1963.pdf": {
+        "name": "Limitation Act",
+        "year": 1963,
+        "aliases": ["limitation act"],
+    },
+    "Patent Act 1970.pdf": {
+        "name": "Patents Act",
+        "year": 1970,
+        "aliases": ["patents act", "patent act"],
+    },
+    "PenalCode.pdf": {
+        "name": "Indian Penal Code",
+        "year": 1860,
+        "aliases": ["ipc", "i.p.c", "indian penal code", "penal code"],
+    },
+    "Prevention of Corruption 1988.pdf": {
+        "name": "Prevention of Corruption Act",
+        "year": 1988,
+        "aliases": ["prevention of corruption act", "pc act"],
+    },
+    "Registration Act 1860.pdf": {
+        "name": "Registration Act",
+        "year": 1860,
+        "aliases": ["registration act"],
+    },
+    "Social Security 2020.pdf": {
+        "name": "Code on Social Security",
+        "year": 2020,
+        "aliases": ["code on social security", "social security code"],
+    },
+    "Specific Relief 1963.pdf": {
+        "name": "Specific Relief Act",
+        "year": 1963,
+        "aliases": ["specific relief act", "sra"],
+    },
+    "Trade Marks Act 1999.pdf": {
+        "name": "Trade Marks Act",
+        "year": 1999,
+        "aliases": ["trade marks act", "trademarks act", "trade mark act"],
+    },
+    "Transfer of Property 1882.pdf": {
+        "name": "Transfer of Property Act",
+        "year": 1882,
+        "aliases": ["transfer of property act", "tpa"],
+    },
+    "Wildlife Act 1972.pdf": {
+        "name": "Wild Life (Protection) Act",
+        "year": 1972,
+        "aliases": ["wildlife act", "wild life act", "wild life protection act"],
+    },
+}
+
+# Longest aliases first so "code of criminal procedure" wins over shorter overlaps.
+_ALIASES = sorted(
+    ((alias, file_name) for file_name, act in ACTS.items() for alias in act["aliases"]),
+    key=lambda item: len(item[0]),
+    reverse=True,
+)
+# An alias counts only as a whole word, so "sra" does not match "israel" or "sra2".
+_ALIAS_PATTERNS = [
+    (re.compile(r"(?<!\w)" + re.escape(alias) + r"(?!\w)"), file_name) for alias, file_name in _ALIASES
+]
+
+
+def act_for_source(source: str | None) -> str | None:
+    """The ACTS key for a chunk's `source` metadata (a path under PDFS/)."""
+    if not source:
+        return None
+    file_name = os.path.basename(source.replace("\\", "/"))
+    return file_name if file_name in ACTS else None
+
+
+def acts_in_query(query_text: str) -> list[str]:
+    """ACTS keys for every act the query mentions by name or abbreviation."""
+    lowered = query_text.lower()
+    found = []
+    for pattern, file_name in _ALIAS_PATTERNS:
+        if file_name not in found and pattern.search(lowered):
+            found.append(file_name)
+    return found
+
+
+def resolve_act(value: str) -> str | None:
+    """The ACTS key for an act given by file name, full name or alias."""
+    if value in ACTS:
+        return value
+    lowered = value.strip().lower()
+    for file_name, act in ACTS.items():
+        if lowered == act["name"].lower() or lowered in act["aliases"]:
+            return file_name
+    return None
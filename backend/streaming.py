@@ -0,0 +1,55 @@
+import base64
+import json
+
+from fastapi.responses import StreamingResponse
+
+
+def format_sse(event: str, data) -> str:
+    if isinstance(data, bytes):
+        data = base64.b64encode(data).decode("ascii")
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events) -> StreamingResponse:
+    """
+    Wraps an async generator of `(event, data)` pairs in a Server-Sent Events
+    response. Audio chunks (bytes) are sent base64-encoded; a failure part-way
+    through is reported as an `error` event since the status line has already
+    been sent.
+    """
+
+    async def body():
+        try:
+            async for event, data in events:
+                yield format_sse(event, data)
+        except Exception as e:
+            print(f"Streaming pipeline failed: {e}")
+            yield format_sse("error", {"detail": f"An unexpected error occurred: {e}"})
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def ndjson_response(items) -> StreamingResponse:
+    """
+    Wraps an async generator of dicts in a newline-delimited JSON response,
+    one object per line. As with `sse_response`, a failure part-way through
+    is reported in-band, as a final `{"status": "error"}` line.
+    """
+
+    async def body():
+        try:
+            async for item in items:
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        except Exception as e:
+            print(f"Batch failed: {e}")
+            yield json.dumps({"status": "error", "error": f"An unexpected error occurred: {e}"}) + "\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,65 @@
+import unittest
+from types import SimpleNamespace
+
+from context_builder import build_context, drop_near_duplicates, merge_adjacent, pack
+
+
+def chunk(text: str, chunk_id: str | None = None, source: str = "data/PenalCode.pdf", page: int = 0):
+    return SimpleNamespace(page_content=text, metadata={"id": chunk_id, "source": source, "page": page})
+
+
+OVERLAP = "the overlapping text shared by both chunks"
+
+
+class MergeTest(unittest.TestCase):
+    def test_neighbours_merge_without_repeating_the_overlap(self):
+        blocks = merge_adjacent([
+            chunk(f"first part {OVERLAP}", "data/PenalCode.pdf:0:1"),
+            chunk(f"{OVERLAP} second part", "data/PenalCode.pdf:0:2"),
+            chunk(f"zeroth part {OVERLAP[:10]}", "data/PenalCode.pdf:0:0"),
+        ])
+
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(blocks[0].page_content.count(OVERLAP), 1)
+        self.assertEqual(blocks[0].ids, [f"data/PenalCode.pdf:0:{i}" for i in range(3)])
+
+    def test_other_pages_stay_apart(self):
+        blocks = merge_adjacent([
+            chunk("one", "data/PenalCode.pdf:0:1"),
+            chunk("two", "data/PenalCode.pdf:1:2"),
+            chunk("three"),
+        ])
+        self.assertEqual(len(blocks), 3)
+
+
+class DeduplicateTest(unittest.TestCase):
+    def test_near_duplicates_keep_the_first(self):
+        text = "whoever commits murder shall be punished with death or imprisonment for life"
+        blocks = merge_adjacent([
+            chunk(text, "a:0:0"),
+            chunk(text + " and fine", "b:0:0"),
+            chunk("an entirely different provision about theft of movable property", "c:0:0"),
+        ])
+        self.assertEqual([block.ids for block in drop_near_duplicates(blocks)], [["a:0:0"], ["c:0:0"]])
+
+
+class PackTest(unittest.TestCase):
+    def test_stops_at_the_budget(self):
+        documents = [chunk("x" * 40), chunk("y" * 40), chunk("z" * 4)]
+        self.assertEqual(pack(documents, 22), documents[:2])
+
+    def test_skips_a_document_larger_than_the_budget(self):
+        documents = [chunk("x" * 400), chunk("y" * 40), chunk("z" * 40)]
+        self.assertEqual(pack(documents, 22), documents[1:])
+
+    def test_build_context_labels_and_sources(self):
+        context, sources = build_context([chunk("Section 302 text.", "data/PenalCode.pdf:4:0", page=4)])
+
+        self.assertEqual(len(sources), 1)
+        self.assertTrue(context.startswith("[1] "))
+        self.assertIn("page 5", context)
+        self.assertIn("Section 302 text.", context)
+
+
+if __name__ == "__main__":
+    unittest.main()
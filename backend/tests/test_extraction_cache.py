@@ -0,0 +1,56 @@
+import gc
+import os
+import tempfile
+import unittest
+import warnings
+
+from extraction_cache import ExtractionCache
+
+
+class ExtractionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "extractions.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_and_put(self):
+        cache = ExtractionCache(self.path, max_bytes=1024)
+        self.assertIsNone(cache.get("missing"))
+        cache.put("key", "extracted text")
+        self.assertEqual(cache.get("key"), "extracted text")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_evicts_least_recently_used_beyond_max_bytes(self):
+        cache = ExtractionCache(self.path, max_bytes=25)
+        cache.put("a", "a" * 10)
+        cache.put("b", "b" * 10)
+        cache.get("a")
+        cache.put("c", "c" * 10)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "a" * 10)
+        self.assertEqual(cache.get("c"), "c" * 10)
+
+    def test_replacing_an_entry_does_not_count_it_twice(self):
+        cache = ExtractionCache(self.path, max_bytes=25)
+        cache.put("a", "a" * 10)
+        for _ in range(5):
+            cache.put("b", "b" * 10)
+        self.assertEqual(cache._total, 20)
+        self.assertEqual(cache.get("a"), "a" * 10)
+
+    def test_connections_are_closed(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+            cache = ExtractionCache(self.path, max_bytes=1024)
+            cache.put("key", "text")
+            cache.get("key")
+            gc.collect()
+        self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import pickle
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import hybrid_index
+from hybrid_index import LexicalIndex
+
+
+class LexicalIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "lexical_index.pickle")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_search_and_citations(self):
+        index = LexicalIndex()
+        index.add("a", "302. Punishment for murder.—Whoever commits murder", "PenalCode.pdf")
+        index.add("b", "378. Theft.—Whoever intending to take dishonestly", "PenalCode.pdf")
+
+        self.assertEqual(index.search("punishment for murder", 1)[0][0], "a")
+        self.assertEqual(index.lookup_citations("What does section 378 say?", 5), ["b"])
+
+    def test_scoped_searches_fall_back_to_every_act(self):
+        index = LexicalIndex()
+        index.add("a", "302. Punishment for murder.", "PDFS/PenalCode.pdf")
+
+        self.assertEqual(index.search("murder", 1, ["Specific Relief 1963.pdf"])[0][0], "a")
+        self.assertEqual(index.lookup_citations("section 302 of the TPA", 5), ["a"])
+
+    def test_load_records_the_corpus_version(self):
+        index = LexicalIndex()
+        index.add("a", "302. Punishment for murder.", "PenalCode.pdf")
+        index.save(self.path)
+
+        with mock.patch.object(hybrid_index, "corpus_version", return_value="v1"):
+            loaded = LexicalIndex.load(self.path)
+            missing = LexicalIndex.load(os.path.join(self.directory.name, "missing.pickle"))
+
+        self.assertEqual(loaded.corpus_version, "v1")
+        self.assertEqual(set(loaded.chunks), {"a"})
+        self.assertEqual(missing.corpus_version, "v1")
+        self.assertEqual(missing.chunks, {})
+
+    def test_load_uses_the_persisted_postings(self):
+        index = LexicalIndex()
+        index.add("a", "302. Punishment for murder.", "PenalCode.pdf")
+        index.save(self.path)
+
+        loaded = LexicalIndex.load(self.path)
+        with mock.patch.object(LexicalIndex, "_build") as build:
+            self.assertEqual(loaded.search("murder", 1)[0][0], "a")
+            self.assertEqual(loaded.lookup_citations("section 302", 5), ["a"])
+        build.assert_not_called()
+
+    def test_older_files_are_rebuilt(self):
+        index = LexicalIndex()
+        index.add("a", "302. Punishment for murder.", "PenalCode.pdf")
+        with open(self.path, "wb") as f:
+            pickle.dump(index.chunks, f)
+
+        self.assertEqual(LexicalIndex.load(self.path).search("murder", 1)[0][0], "a")
+
+    def test_concurrent_searches_build_once(self):
+        index = LexicalIndex()
+        index.add("a", "302. Punishment for murder.", "PenalCode.pdf")
+        build = index._build
+        calls = []
+
+        def slow_build():
+            calls.append(1)
+            threading.Event().wait(0.05)
+            build()
+
+        index._build = slow_build
+        threads = [threading.Thread(target=index.search, args=("murder", 1)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest import mock
+
+import ingest
+from hybrid_index import LexicalIndex
+
+
+def chunk(source: str, page: int, index: int, text: str):
+    return SimpleNamespace(
+        page_content=text,
+        metadata={"source": source, "page": page, "id": f"{source}:{page}:{index}"},
+    )
+
+
+class InlineExecutor:
+    """Runs the parse jobs in this process, so `parse_pdf` can be patched."""
+
+    def __init__(self, max_workers=None, mp_context=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class FakeCollection:
+    def __init__(self, store):
+        self.store = store
+
+    def update(self, ids, metadatas):
+        for chunk_id, metadata in zip(ids, metadatas):
+            self.store.metadatas[chunk_id] = dict(metadata)
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.documents = {}
+        self.metadatas = {}
+        self.embedded = []
+        self._collection = FakeCollection(self)
+
+    def get(self, ids, include):
+        found = [chunk_id for chunk_id in ids if chunk_id in self.documents]
+        return {"ids": found, "documents": [self.documents[chunk_id] for chunk_id in found]}
+
+    def add_documents(self, documents, ids):
+        for document, chunk_id in zip(documents, ids):
+            self.documents[chunk_id] = document.page_content
+            self.metadatas[chunk_id] = dict(document.metadata)
+            self.embedded.append(chunk_id)
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self.documents.pop(chunk_id, None)
+            self.metadatas.pop(chunk_id, None)
+
+
+class TagChunksTest(unittest.TestCase):
+    def test_tags_act_and_carries_section_and_chapter_forward(self):
+        source = "PDFS/PenalCode.pdf"
+        chunks = ingest.tag_chunks([
+            chunk(source, 0, 0, "CHAPTER XVII\nOF OFFENCES AGAINST PROPERTY\n378. Theft.—Whoever intends"),
+            chunk(source, 0, 1, "to take dishonestly any movable property out of the possession"),
+            chunk(source, 0, 2, "of any person without consent.\n379. Punishment for theft.—Whoever"),
+        ])
+
+        self.assertEqual(chunks[0].metadata["act"], "PenalCode.pdf")
+        self.assertEqual(chunks[0].metadata["year"], 1860)
+        self.assertEqual(chunks[0].metadata["chapter"], "XVII")
+        self.assertEqual(chunks[1].metadata["section"], "378")
+        self.assertEqual(chunks[1].metadata["chapter"], "XVII")
+        # The chunk starts inside section 378, though it also opens 379.
+        self.assertEqual(chunks[2].metadata["section"], "378")
+
+    def test_unknown_source_leaves_out_act_fields(self):
+        (tagged,) = ingest.tag_chunks([chunk("PDFS/unknown.pdf", 0, 0, "no headings here")])
+        self.assertNotIn("act", tagged.metadata)
+        self.assertNotIn("section", tagged.metadata)
+
+
+class RetagTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pdfs = os.path.join(self.directory.name, "PDFS")
+        os.makedirs(self.pdfs)
+        self.path = os.path.join(self.pdfs, "PenalCode.pdf")
+        with open(self.path, "wb") as f:
+            f.write(b"%PDF-1.4 fixture")
+        self.texts = ["378. Theft.—Whoever intends", "to take dishonestly any movable property"]
+
+        patches = [
+            mock.patch.object(ingest, "ProcessPoolExecutor", InlineExecutor),
+            mock.patch.object(ingest, "parse_pdf", self.parse_pdf),
+            mock.patch.object(ingest, "MANIFEST_PATH", os.path.join(self.directory.name, "manifest.json")),
+            mock.patch.object(ingest, "CHROMA_PATH", self.directory.name),
+            mock.patch.object(ingest, "bump_corpus_version"),
+            mock.patch.object(LexicalIndex, "load", classmethod(lambda cls: cls())),
+            mock.patch.object(LexicalIndex, "save"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def parse_pdf(self, path):
+        chunks = [chunk(path, 0, index, text) for index, text in enumerate(self.texts)]
+        return path, 1, ingest.tag_chunks(chunks)
+
+    def test_store_without_manifest_is_retagged_without_reembedding(self):
+        # A store built before chunks were tagged, with no manifest.
+        store = FakeVectorStore()
+        for index, text in enumerate(self.texts):
+            chunk_id = f"{self.path}:0:{index}"
+            store.documents[chunk_id] = text
+            store.metadatas[chunk_id] = {"source": self.path, "page": 0, "id": chunk_id}
+
+        stats = ingest.ingest_directory(self.pdfs, vector_store=store)
+
+        self.assertEqual(store.embedded, [])
+        self.assertEqual(stats["chunks_retagged"], 2)
+        for metadata in store.metadatas.values():
+            self.assertEqual(metadata["act"], "PenalCode.pdf")
+            self.assertEqual(metadata["section"], "378")
+
+        again = ingest.ingest_directory(self.pdfs, vector_store=store)
+        self.assertEqual(again["files_parsed"], 0)
+
+    def test_old_metadata_version_is_retagged(self):
+        store = FakeVectorStore()
+        ingest.ingest_directory(self.pdfs, vector_store=store)
+        self.assertEqual(len(store.embedded), 2)
+
+        with mock.patch.object(ingest, "METADATA_VERSION", ingest.METADATA_VERSION + 1):
+            stats = ingest.ingest_directory(self.pdfs, vector_store=store)
+
+        self.assertEqual(stats["chunks_embedded"], 0)
+        self.assertEqual(stats["chunks_retagged"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
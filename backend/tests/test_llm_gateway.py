@@ -0,0 +1,176 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+import llm_gateway
+import startup
+from llm_gateway import LLMGateway, LLMUnavailableError, TokenBucket, is_retryable
+
+
+class ResourceExhausted(Exception):
+    """Named like the Google API error the gateway retries."""
+
+
+class ScriptedModel:
+    """Answers each call with the next entry of `script`: an exception to raise or a delay then a reply."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def ainvoke(self, prompt, **kwargs):
+        step = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        if isinstance(step, Exception):
+            raise step
+        delay, reply = step
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return reply
+
+    async def astream(self, prompt, **kwargs):
+        yield await self.ainvoke(prompt, **kwargs)
+
+
+def gateway(model, **kwargs) -> LLMGateway:
+    startup.override("test_model", model)
+    return LLMGateway("test_model", 0, 0, **kwargs)
+
+
+class TokenBucketTest(unittest.IsolatedAsyncioTestCase):
+    def test_try_acquire_stops_at_capacity(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0, capacity=0)
+        self.assertTrue(all(bucket.try_acquire(1000) for _ in range(10)))
+
+    async def test_acquire_waits_for_refill(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        await bucket.acquire()
+        start = time.monotonic()
+        await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.005)
+
+    async def test_oversized_request_waits_for_a_full_bucket(self):
+        bucket = TokenBucket(rate=1000, capacity=5)
+        await asyncio.wait_for(bucket.acquire(50), timeout=1)
+
+
+class IsRetryableTest(unittest.TestCase):
+    def test_retryable_errors(self):
+        self.assertTrue(is_retryable(ResourceExhausted("quota")))
+        self.assertTrue(is_retryable(asyncio.TimeoutError()))
+        self.assertTrue(is_retryable(RuntimeError("HTTP 429 Too Many Requests")))
+
+    def test_cause_chain_is_checked(self):
+        try:
+            try:
+                raise ResourceExhausted("quota")
+            except ResourceExhausted as e:
+                raise RuntimeError("wrapped") from e
+        except RuntimeError as e:
+            self.assertTrue(is_retryable(e))
+
+    def test_other_errors_are_final(self):
+        self.assertFalse(is_retryable(ValueError("bad prompt")))
+
+
+@mock.patch.object(llm_gateway, "LLM_RETRY_BASE_SECONDS", 0.001)
+class LLMGatewayTest(unittest.IsolatedAsyncioTestCase):
+    async def test_retries_transient_errors(self):
+        model = ScriptedModel(ResourceExhausted("quota"), ResourceExhausted("quota"), (0, "answer"))
+        chat = gateway(model, max_retries=3)
+
+        self.assertEqual(await chat.ainvoke("prompt"), "answer")
+        self.assertEqual(model.calls, 3)
+        self.assertEqual(chat.stats()["retries"], 2)
+        self.assertEqual(chat.stats()["in_flight"], 0)
+
+    async def test_raises_unavailable_once_retries_run_out(self):
+        chat = gateway(ScriptedModel(ResourceExhausted("quota")), max_retries=2)
+
+        with self.assertRaises(LLMUnavailableError):
+            await chat.ainvoke("prompt")
+        self.assertEqual(chat.stats()["failures"], 1)
+        self.assertEqual(chat.stats()["in_flight"], 0)
+
+    async def test_does_not_retry_final_errors(self):
+        model = ScriptedModel(ValueError("bad prompt"))
+        chat = gateway(model)
+
+        with self.assertRaises(ValueError):
+            await chat.ainvoke("prompt")
+        self.assertEqual(model.calls, 1)
+
+    async def test_slow_attempt_times_out_and_is_retried(self):
+        model = ScriptedModel((1, "late"), (0, "answer"))
+        chat = gateway(model, timeout=0.05)
+
+        self.assertEqual(await chat.ainvoke("prompt"), "answer")
+        self.assertEqual(model.calls, 2)
+
+    async def test_hedge_wins_and_the_primary_is_cancelled(self):
+        model = ScriptedModel((1, "slow"), (0, "fast"))
+        chat = gateway(model, hedge_after=0.02)
+
+        self.assertEqual(await chat.ainvoke("prompt"), "fast")
+        await asyncio.sleep(0)
+        self.assertEqual(chat.stats()["hedges"], 1)
+        self.assertEqual(model.cancelled, 1)
+        self.assertEqual(chat.stats()["in_flight"], 0)
+
+    async def test_no_hedge_without_free_quota(self):
+        model = ScriptedModel((0.05, "answer"))
+        chat = gateway(model, hedge_after=0.01)
+        # The primary takes the only request the bucket holds.
+        chat.requests = TokenBucket(rate=0.001, capacity=1)
+
+        self.assertEqual(await chat.ainvoke("prompt"), "answer")
+        self.assertEqual(chat.stats()["hedges"], 0)
+        self.assertEqual(model.calls, 1)
+
+    async def test_stream_retries_before_the_first_chunk(self):
+        model = ScriptedModel(ResourceExhausted("quota"), (0, "chunk"))
+        chat = gateway(model)
+
+        self.assertEqual([chunk async for chunk in chat.astream("prompt")], ["chunk"])
+        self.assertEqual(chat.stats()["retries"], 1)
+        self.assertEqual(chat.stats()["in_flight"], 0)
+
+    async def test_stream_cancelled_before_the_first_chunk_frees_its_slot(self):
+        chat = gateway(ScriptedModel((1, "chunk"), (1, "chunk"), (0, "chunk")), max_concurrency=2)
+
+        async def consume():
+            return [chunk async for chunk in chat.astream("prompt")]
+
+        for _ in range(2):
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(consume(), timeout=0.02)
+
+        self.assertEqual(chat.stats()["in_flight"], 0)
+        self.assertEqual(await asyncio.wait_for(consume(), timeout=1), ["chunk"])
+
+    async def test_queueing_counts_toward_the_deadline(self):
+        chat = gateway(ScriptedModel((0, "answer")), max_concurrency=1, deadline=0.05)
+        await chat._model()
+        # Another call holds the only slot for longer than the deadline.
+        await chat._slots.acquire()
+
+        start = time.monotonic()
+        with self.assertRaises(LLMUnavailableError):
+            await asyncio.wait_for(chat.ainvoke("prompt"), timeout=1)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(chat.stats()["failures"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
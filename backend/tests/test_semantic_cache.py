@@ -0,0 +1,86 @@
+import os
+import pickle
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from semantic_cache import SemanticCache, answer_scope
+
+
+def make_cache(path: str, save_interval: float = 0.0) -> SemanticCache:
+    return SemanticCache(path, threshold=0.95, max_entries=10, ttl=3600, save_interval=save_interval)
+
+
+class SemanticCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "answers.pickle")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lookup_is_scoped_and_thresholded(self):
+        cache = make_cache(self.path)
+        cache.store("fp32:human_summarizer:eng", [1.0, 0.0], "answer")
+
+        self.assertEqual(cache.lookup("fp32:human_summarizer:eng", [0.99, 0.01])["text"], "answer")
+        self.assertIsNone(cache.lookup("fp32:human_summarizer:hin", [1.0, 0.0]))
+        self.assertIsNone(cache.lookup("fp32:human_summarizer:eng", [0.0, 1.0]))
+
+    def test_questions_about_different_sections_do_not_share_answers(self):
+        cache = make_cache(self.path)
+        # Near-identical embeddings, as "section 302 IPC" and "section 304 IPC" get.
+        murder, culpable_homicide = [1.0, 0.02], [1.0, 0.03]
+        murder_scope = answer_scope("fp32", "human_summarizer", "eng", ["PenalCode.pdf"], ["section:302"])
+        homicide_scope = answer_scope("fp32", "human_summarizer", "eng", ["PenalCode.pdf"], ["section:304"])
+        cache.store(murder_scope, murder, "Section 302 punishes murder.")
+
+        self.assertIsNotNone(cache.lookup(murder_scope, culpable_homicide))
+        self.assertIsNone(cache.lookup(homicide_scope, culpable_homicide))
+
+    def test_concurrent_saves_do_not_fail_or_leave_temp_files(self):
+        cache = make_cache(self.path)
+        for i in range(10):
+            cache.store("scope", [float(i), 1.0], f"answer {i}")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: cache.save(cache.snapshot()), range(40)))
+
+        self.assertTrue(all(results))
+        self.assertEqual(os.listdir(self.directory.name), ["answers.pickle"])
+        with open(self.path, "rb") as f:
+            self.assertEqual(len(pickle.load(f)["entries"]), 10)
+
+    def test_save_errors_are_logged_not_raised(self):
+        blocker = os.path.join(self.directory.name, "not-a-directory")
+        with open(blocker, "w") as f:
+            f.write("")
+        cache = make_cache(os.path.join(blocker, "answers.pickle"))
+        cache.store("scope", [1.0, 0.0], "answer")
+
+        self.assertTrue(cache.save_due())
+        self.assertFalse(cache.save(cache.snapshot()))
+        self.assertEqual(cache.stats()["save_errors"], 1)
+        # The changes are still unsaved, so the next save retries them.
+        self.assertTrue(cache.save_due())
+
+    def test_saves_are_debounced(self):
+        cache = make_cache(self.path, save_interval=3600)
+        self.assertFalse(cache.save_due())
+
+        cache.store("scope", [1.0, 0.0], "answer")
+        self.assertTrue(cache.save_due())
+        # Claimed: a second caller does not start an overlapping save.
+        self.assertFalse(cache.save_due())
+        cache.save(cache.snapshot())
+
+        cache.store("scope", [0.0, 1.0], "another")
+        self.assertFalse(cache.save_due())
+        self.assertTrue(cache.save_due(force=True))
+        cache.save(cache.snapshot())
+
+        self.assertEqual(len(make_cache(self.path).entries), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import unittest
+
+from single_flight import SingleFlight, normalize_query, request_key
+
+
+class KeyTest(unittest.TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  What is  BAIL? "), normalize_query("what is bail?"))
+
+    def test_request_key_separates_parts(self):
+        self.assertNotEqual(request_key("ab", "c"), request_key("a", "bc"))
+        self.assertEqual(request_key("legal", "hi", "q"), request_key("legal", "hi", "q"))
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_requests_share_one_execution(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def answer():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.run("key", answer) for _ in range(5)))
+
+        self.assertEqual(results, ["answer"] * 5)
+        self.assertEqual(calls, 1)
+        self.assertEqual(flight.stats()["leaders"], 1)
+        self.assertEqual(flight.stats()["followers"], 4)
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    async def test_finished_key_runs_again(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def answer():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        self.assertEqual(await flight.run("key", answer), 1)
+        self.assertEqual(await flight.run("key", answer), 2)
+
+    async def test_cancelled_caller_does_not_cancel_the_shared_work(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def answer():
+            await release.wait()
+            return "answer"
+
+        leader = asyncio.ensure_future(flight.run("key", answer))
+        follower = asyncio.ensure_future(flight.run("key", answer))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await follower, "answer")
+        self.assertTrue(leader.cancelled())
+
+    async def test_work_finishes_after_every_caller_has_gone(self):
+        flight = SingleFlight()
+        finished = asyncio.Event()
+
+        async def answer():
+            await asyncio.sleep(0.01)
+            finished.set()
+            return "answer"
+
+        caller = asyncio.ensure_future(flight.run("key", answer))
+        await asyncio.sleep(0)
+        caller.cancel()
+
+        await asyncio.wait_for(finished.wait(), timeout=1)
+        await asyncio.sleep(0)
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    async def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+
+        async def answer():
+            await asyncio.sleep(0)
+            raise RuntimeError("failed")
+
+        results = await asyncio.gather(
+            flight.run("key", answer), flight.run("key", answer), return_exceptions=True
+        )
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
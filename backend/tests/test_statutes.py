@@ -0,0 +1,18 @@
+import unittest
+
+from statutes import acts_in_query
+
+
+class ActsInQueryTest(unittest.TestCase):
+    def test_names_and_abbreviations(self):
+        self.assertEqual(acts_in_query("Is this bailable under the CrPC?"), ["Criminal Procedure 1973.pdf"])
+        self.assertEqual(acts_in_query("section 10 of the Specific Relief Act"), ["Specific Relief 1963.pdf"])
+
+    def test_short_aliases_match_whole_words_only(self):
+        self.assertEqual(acts_in_query("Can I travel to Israel on a tourist visa?"), [])
+        self.assertEqual(acts_in_query("What does the TPA2 clause in my policy mean?"), [])
+        self.assertEqual(acts_in_query("Is a gift of land valid under the TPA?"), ["Transfer of Property 1882.pdf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Per-request tracing and stage timing.
+
+Every request runs in a trace held in a context variable, so spans opened
+anywhere below it (embedding, Chroma search, the LLM call, OCR pages,
+translation, TTS) attach to it without passing it around. Every span feeds
+the stage latency histogram; only a sampled fraction of traces
+(TRACE_SAMPLE_RATE) is logged in full, as one JSON line per request.
+
+Prompts and responses are not logged unless PROMPT_LOGGING is enabled.
+"""
+import contextvars
+import json
+import os
+import random
+import time
+import uuid
+from contextlib import contextmanager
+
+from metrics import registry
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+PROMPT_LOGGING = os.getenv("PROMPT_LOGGING", "false").lower() == "true"
+
+stage_seconds = registry.histogram(
+    "pravaah_stage_duration_seconds", "Time spent in each pipeline stage.", ["stage"]
+)
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+_current_span = contextvars.ContextVar("span", default=None)
+
+
+class Trace:
+    def __init__(self, name: str, sampled: bool):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.sampled = sampled
+        self.start = time.perf_counter()
+        self.spans = []
+        self.totals = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "duration_ms": round((time.perf_counter() - self.start) * 1000, 2),
+            **self.totals,
+            "spans": self.spans,
+        }
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str):
+    trace = Trace(name, sampled=random.random() < TRACE_SAMPLE_RATE)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        if trace.sampled:
+            print(json.dumps(trace.to_dict()))
+
+
+def record(stage: str, seconds: float, **attributes):
+    """Records a stage timed by the caller, for code that cannot hold a span open."""
+    stage_seconds.observe(seconds, stage=stage)
+    trace = _current_trace.get()
+    if trace is not None and trace.sampled:
+        trace.spans.append(
+            {
+                "stage": stage,
+                "parent": _current_span.get(),
+                "offset_ms": round((time.perf_counter() - seconds - trace.start) * 1000, 2),
+                "duration_ms": round(seconds * 1000, 2),
+                **attributes,
+            }
+        )
+
+
+def add_totals(**amounts):
+    """Adds to per-request totals, such as token counts, logged with the trace."""
+    trace = _current_trace.get()
+    if trace is not None:
+        for name, amount in amounts.items():
+            trace.totals[name] = trace.totals.get(name, 0) + (amount or 0)
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """
+    Times the enclosed block as `stage`. Must not be held open across a
+    `yield` in an async generator, whose steps may run in different contexts.
+    """
+    span_id = uuid.uuid4().hex[:16]
+    token = _current_span.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        record(stage, time.perf_counter() - start, span_id=span_id, **attributes)
+
+
+def log_prompt(label: str, text: str):
+    if PROMPT_LOGGING:
+        print("=" * 55)
+        print(f"{label}:\n{text}")
+        print("=" * 55)
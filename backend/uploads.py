@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import os
+
+from fastapi import HTTPException, UploadFile
+
+from extraction_cache import extraction_cache
+from ocr_processor import ocr_settings_key, process_bytes_to_text_async
+from tracing import span
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_MB", "25")) * 1024 * 1024
+
+# Leading bytes each accepted file type must start with. PDFs may have a few
+# bytes of junk before the header, which readers tolerate.
+SIGNATURES = {
+    ".pdf": (b"%PDF-",),
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+}
+PDF_HEADER_WINDOW = 1024
+
+
+def _matches_signature(head: bytes, file_ext: str) -> bool:
+    signatures = SIGNATURES.get(file_ext)
+    if signatures is None:
+        return True
+    if file_ext == ".pdf":
+        return any(signature in head[:PDF_HEADER_WINDOW] for signature in signatures)
+    return head.startswith(signatures)
+
+
+async def _read_upload(file: UploadFile, file_ext: str, max_bytes: int) -> tuple[bytes, str]:
+    """
+    Reads the upload once, in chunks, hashing it on the way. Rejects it as
+    soon as it exceeds `max_bytes`, or if its first bytes do not match its
+    extension.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=_too_large())
+
+    digest = hashlib.sha256()
+    data = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if not data and not _matches_signature(chunk, file_ext):
+            raise HTTPException(
+                status_code=400, detail=f"The file's contents do not match its {file_ext} extension."
+            )
+        data += chunk
+        if len(data) > max_bytes:
+            raise HTTPException(status_code=413, detail=_too_large())
+        digest.update(chunk)
+    return bytes(data), digest.hexdigest()
+
+
+def _too_large() -> str:
+    return f"Uploads are limited to {UPLOAD_MAX_BYTES // (1024 * 1024)} MB."
+
+
+async def read_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> tuple[bytes, str, str]:
+    """Reads and validates an upload, returning `(data, sha256, extension)`."""
+    file_ext = os.path.splitext(file.filename)[1].lower()
+    with span("upload_read"):
+        data, digest = await _read_upload(file, file_ext, max_bytes)
+    return data, digest, file_ext
+
+
+async def extract_upload_text(file: UploadFile, upload_directory: str) -> tuple[bool, str]:
+    """
+    Reads an upload and extracts its text, returning the same
+    `(success, text or error)` pair as `process_file_to_text`.
+
+    The bytes are handed to the extractor directly; `upload_directory` is
+    only written to when a PDF needs OCR in the worker processes.
+    """
+    data, digest, file_ext = await read_upload(file)
+    return await extract_text(data, digest, file_ext, upload_directory)
+
+
+async def extract_text(data: bytes, digest: str, file_ext: str, upload_directory: str) -> tuple[bool, str]:
+    """
+    Extracts the text of upload bytes already read by `read_upload`.
+
+    Re-uploads of the same file (to switch between summarizer and advisor, or
+    to change language) are served from the extraction cache without running
+    PyMuPDF or tesseract again.
+    """
+    key = f"{digest}:{file_ext}:{ocr_settings_key()}"
+
+    cached = await asyncio.to_thread(extraction_cache.get, key)
+    if cached is not None:
+        print(f"Extraction served from cache: {digest}")
+        return True, cached
+
+    with span("extraction", file_type=file_ext, size=len(data)):
+        success, content = await process_bytes_to_text_async(data, file_ext, upload_directory)
+    if success:
+        await asyncio.to_thread(extraction_cache.put, key, content)
+    return success, content
@@ -1,13 +1,42 @@
 import os
 import shutil
-from langchain_community.document_loaders.pdf import PyPDFDirectoryLoader
+import uuid
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.schema.document import Document
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+
+# The PDF loader, Chroma and the embedding model pull in torch, chromadb and
+# sentence-transformers, so they are imported where used rather than here; the
+# app imports this module and must start quickly.
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", "chroma_langchain_db")
+CORPUS_VERSION_PATH = os.path.join(CHROMA_PATH, "corpus_version")
+
+EMBEDDING_MODEL = "hkunlp/instructor-large"
+
+# Which embedding backend to use:
+#   fp32  - instructor-large as published (the baseline)
+#   int8  - instructor-large with dynamically int8-quantized linear layers
+#   onnx  - instructor-large exported to ONNX Runtime (uv sync --extra onnx)
+#   small - a smaller model, EMBEDDING_SMALL_MODEL
+EMBEDDING_BACKENDS = ("fp32", "int8", "onnx", "small")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "fp32")
+EMBEDDING_SMALL_MODEL = os.getenv("EMBEDDING_SMALL_MODEL", "BAAI/bge-small-en-v1.5")
+
+# HNSW index settings; the defaults are Chroma's own. The distance space, M
+# and construction ef are fixed when a collection is created, so changing
+# them means ingesting into a fresh CHROMA_PATH. The search ef can be changed
+# on an existing collection: when HNSW_SEARCH_EF is set it is applied
+# whenever the store is opened, otherwise the collection keeps its own (100
+# by default in Chroma 1.x). Use benchmarks/ann_eval.py to pick values.
+HNSW_SPACE = os.getenv("HNSW_SPACE", "l2")
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_CONSTRUCTION_EF = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))
+HNSW_SEARCH_EF = int(os.getenv("HNSW_SEARCH_EF")) if os.getenv("HNSW_SEARCH_EF") else None
 
 
 def load_documents():
+    from langchain_community.document_loaders.pdf import PyPDFDirectoryLoader
+
     document_loader = PyPDFDirectoryLoader("PDFS")
     return document_loader.load()
 
@@ -19,16 +48,101 @@ def spilt_documents(documents: list[Document]):
     return text_spliter.split_documents(documents)
 
 
-def get_embedding_function():
+def get_embedding_function(backend: str | None = None):
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend {backend!r}. Choose one of {EMBEDDING_BACKENDS}."
+        )
+
     device = "cpu"
-    embeddings = HuggingFaceEmbeddings(
-        model_name="hkunlp/instructor-large",
-        model_kwargs={"device": device}
-    )
-    print(f"Embedding model running on: {device}")
+    model_name = EMBEDDING_SMALL_MODEL if backend == "small" else EMBEDDING_MODEL
+    model_kwargs = {"device": device}
+    if backend == "onnx":
+        model_kwargs["backend"] = "onnx"
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    embeddings = HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs)
+
+    if backend == "int8":
+        import torch
+
+        torch.quantization.quantize_dynamic(
+            embeddings._client, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+
+    print(f"Embedding model {model_name} ({backend}) running on: {device}")
     return embeddings
 
 
+def collection_name(backend: str | None = None) -> str:
+    """
+    The Chroma collection holding vectors for an embedding backend. Vectors
+    from different backends are not comparable, so each gets its own
+    collection; fp32 keeps Chroma's default name so existing indexes still load.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "fp32":
+        return "langchain"
+    if backend == "small":
+        return f"statutes-small-{EMBEDDING_SMALL_MODEL.split('/')[-1]}"
+    return f"statutes-{backend}"
+
+
+def hnsw_metadata(
+    space: str = HNSW_SPACE,
+    m: int = HNSW_M,
+    construction_ef: int = HNSW_CONSTRUCTION_EF,
+    search_ef: int | None = HNSW_SEARCH_EF,
+) -> dict:
+    """Collection metadata that configures the HNSW index of a new collection."""
+    metadata = {
+        "hnsw:space": space,
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+    }
+    if search_ef is not None:
+        metadata["hnsw:search_ef"] = search_ef
+    return metadata
+
+
+def set_search_ef(collection, search_ef: int):
+    """Sets the ef used at query time by an existing collection, if it differs."""
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    if hnsw.get("ef_search") != search_ef:
+        collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+
+
+def get_vector_store(embedding_function=None, backend: str | None = None):
+    from langchain_chroma import Chroma
+
+    vector_store = Chroma(
+        collection_name=collection_name(backend),
+        persist_directory=CHROMA_PATH,
+        embedding_function=embedding_function or get_embedding_function(backend),
+        collection_metadata=hnsw_metadata(),
+    )
+
+    collection = vector_store._collection
+    space = ((collection.configuration or {}).get("hnsw") or {}).get("space")
+    if space and space != HNSW_SPACE:
+        print(
+            f"Collection {collection.name} uses the {space} space, not HNSW_SPACE={HNSW_SPACE}; "
+            "re-ingest into a fresh CHROMA_PATH to change it."
+        )
+    if HNSW_SEARCH_EF is not None:
+        set_search_ef(collection, HNSW_SEARCH_EF)
+    return vector_store
+
+
+def act_filter(acts: list[str] | None) -> dict | None:
+    """A Chroma `where` clause matching chunks tagged with any of `acts` (ACTS keys)."""
+    if not acts:
+        return None
+    return {"act": acts[0]} if len(acts) == 1 else {"act": {"$in": list(acts)}}
+
+
 def calculate_chunk_ids(chunks):
     last_pg_id = None
     current_chunk_index = 0
@@ -52,10 +166,7 @@ def calculate_chunk_ids(chunks):
 
 
 def add_to_chroma(chunks: list[Document]):
-    vector_store = Chroma(
-        persist_directory="chroma_langchain_db",
-        embedding_function=get_embedding_function(),
-    )
+    vector_store = get_vector_store()
 
     chunks_with_ids = calculate_chunk_ids(chunks)
     existing_items = vector_store.get(include=[])
@@ -72,10 +183,30 @@ def add_to_chroma(chunks: list[Document]):
         print("Adding new documents:", len(new_chunks))
         new_chunk_ids = [chunk.metadata["id"] for chunk in new_chunks]
         vector_store.add_documents(new_chunks, ids=new_chunk_ids)
+        bump_corpus_version()
     else:
         print("No new documents to add")
 
 
+def corpus_version() -> str | None:
+    """
+    An opaque token that changes whenever the indexed corpus does, so that
+    anything derived from search results (such as cached answers) can tell
+    when it has gone stale.
+    """
+    try:
+        with open(CORPUS_VERSION_PATH, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def bump_corpus_version():
+    os.makedirs(CHROMA_PATH, exist_ok=True)
+    with open(CORPUS_VERSION_PATH, "w", encoding="utf-8") as f:
+        f.write(uuid.uuid4().hex)
+
+
 def clear_database():
-    if os.path.exists("chroma_langchain_db"):
-        shutil.rmtree("chroma_langchain_db")
+    if os.path.exists(CHROMA_PATH):
+        shutil.rmtree(CHROMA_PATH)